@@ -0,0 +1,153 @@
+"""Conformance and speed check of the parser backends.
+
+Every page of the corpus is parsed by every backend of `PARSERS`. The data
+of each backend has to equal the data of `REFERENCE_PARSER`, differing
+fields are listed and make the check fail. The fastest run per page and
+backend is reported along with the order `rank_parsers` would try the
+backends in. Each page is also served by a local stub server and fetched
+in streaming mode and as a nowcast, which collect the sections while
+downloading, their data has to equal the reference as well.
+
+Only recorded pages show that the backends agree on the pages of
+WetterOnline, the synthetic pages used without them are made to match the
+parsers. `--recorded` fails the check when there are none.
+
+    python -m benchmarks.conformance --recorded
+    python -m benchmarks.conformance --repeat 20 path/to/pages
+"""
+
+import argparse
+import asyncio
+from dataclasses import asdict
+from pathlib import Path
+import sys
+import time
+from typing import Any
+
+from aiohttp import ClientSession
+
+from custom_components.wetteronline.wetteronline_api import (
+    REFERENCE_PARSER,
+    WetterOnline,
+    WetterOnlineData,
+    compare_parsers,
+    rank_parsers,
+)
+
+from .pages import PAGES_DIR, load_recorded, synthetic_corpus
+from .stub_server import StubServer
+
+FETCH_MODES = ("streaming", "nowcast")
+
+
+def differences(data: WetterOnlineData, reference: WetterOnlineData) -> list[str]:
+    """Return the paths of the fields whose values differ."""
+    found: list[str] = []
+    _diff(asdict(data), asdict(reference), "", found)
+    return found
+
+
+def _diff(value: Any, reference: Any, path: str, found: list[str]) -> None:
+    if isinstance(value, dict) and isinstance(reference, dict):
+        for key in value.keys() | reference.keys():
+            _diff(value.get(key), reference.get(key), f"{path}.{key}", found)
+    elif isinstance(value, list) and isinstance(reference, list):
+        if len(value) != len(reference):
+            found.append(f"{path}: {len(value)} items, expected {len(reference)}")
+            return
+        for index, (item, expected) in enumerate(zip(value, reference, strict=True)):
+            _diff(item, expected, f"{path}[{index}]", found)
+    elif value != reference:
+        found.append(f"{path}: {value!r}, expected {reference!r}")
+
+
+def status(value: Any, reference: Any) -> str:
+    """Return ok or the differences of `value` from `reference`."""
+    if reference is None or value == reference:
+        return "ok"
+    if isinstance(value, WetterOnlineData):
+        found = differences(value, reference)
+    else:
+        found = []
+        _diff(value, reference, "", found)
+    text = f"{len(found)} differences"
+    for difference in found[:10]:
+        text += f"\n      {difference}"
+    return text
+
+
+async def fetch(pages: dict[str, str]) -> dict[str, dict[str, tuple[Any, float]]]:
+    """Return the data and seconds of every fetch mode, or the error raised."""
+    results: dict[str, dict[str, tuple[Any, float]]] = {}
+    async with StubServer(pages) as server, ClientSession() as session:
+        for name in pages:
+            client = WetterOnline(
+                session, f"/wetter/{name}", streaming=True, base_url=server.base_url
+            )
+            calls = (client.async_get_weather, client.async_get_nowcast)
+            results[name] = {}
+            for mode, call in zip(FETCH_MODES, calls, strict=True):
+                started = time.perf_counter()
+                try:
+                    value = await call()
+                except Exception as error:  # noqa: BLE001
+                    value = error
+                results[name][mode] = (value, time.perf_counter() - started)
+    return results
+
+
+def main() -> None:
+    """Run the check."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("pages", type=Path, nargs="?", default=PAGES_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--recorded", action="store_true", help="fail without recorded pages"
+    )
+    args = parser.parse_args()
+
+    if not (pages := load_recorded(args.pages)):
+        print(
+            f"No recorded pages in {args.pages}, see benchmarks.record.",
+            file=sys.stderr,
+        )
+        if args.recorded:
+            sys.exit(2)
+        print(
+            "Checking synthetic pages only, they do not show that the "
+            "backends agree on WetterOnline pages.",
+            file=sys.stderr,
+        )
+        pages = synthetic_corpus()
+    fetched = asyncio.run(fetch(pages))
+    failed = False
+    for name, raw_html in pages.items():
+        results = compare_parsers(raw_html, repeat=args.repeat)
+        reference = results[REFERENCE_PARSER].data
+        print(f"{name}: {', '.join(rank_parsers(raw_html))}")
+        for result in results.values():
+            if result.error is not None:
+                text = f"failed: {result.error}"
+            else:
+                text = status(result.data, reference)
+            failed |= text != "ok"
+            print(f"  {result.parser:<9} {result.seconds * 1000:9.2f} ms  {text}")
+        expected = {
+            "streaming": reference,
+            "nowcast": reference and reference.current_observations,
+        }
+        for mode, (value, seconds) in fetched[name].items():
+            if isinstance(value, Exception):
+                text = f"failed: {value!r}"
+            else:
+                text = status(value, expected[mode])
+            failed |= text != "ok"
+            print(f"  {mode:<9} {seconds * 1000:9.2f} ms  {text}")
+
+    sys.exit(failed)
+
+
+if __name__ == "__main__":
+    main()
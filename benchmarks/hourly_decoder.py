@@ -0,0 +1,61 @@
+"""Micro-benchmark of the hourly forecast script decoder.
+
+Compares `decode_hourly_script` with the previous string splitting and
+`ast.literal_eval` based decoding on the hourly scripts of a saved page.
+
+    python -m benchmarks.hourly_decoder path/to/page.html
+"""
+
+import argparse
+import ast
+from pathlib import Path
+import timeit
+
+from custom_components.wetteronline.wetteronline_api import (
+    HOURLY_REPLACE_KEYS,
+    LxmlWeatherUtils,
+    decode_hourly_script,
+)
+
+
+def literal_eval_decoder(script: str) -> dict:
+    """Decode a script the way WeatherUtils.hourly_forecast used to."""
+    script = script.split("({", 1)[1].split("})", 1)[0].strip().replace(" ", "")
+    hourly_data_raw = []
+    for entry in script.split("\n"):
+        key = entry.split(":")[0]
+        value = entry.split(":")[1]
+        key = HOURLY_REPLACE_KEYS.get(key, key)
+        hourly_data_raw.append(f'"{key}": {value}')
+    hourly_data = ast.literal_eval("{" + "".join(hourly_data_raw) + "}")
+    hourly_data.pop("docrootVersion", None)
+    return hourly_data
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("page", type=Path, help="saved WetterOnline page")
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    raw_html = args.page.read_text(encoding="utf-8")
+    scripts = LxmlWeatherUtils(raw_html)._hourly_scripts()
+    print(f"{len(scripts)} hourly scripts")
+
+    for name, decoder in (
+        ("literal_eval", literal_eval_decoder),
+        ("tokenizer", decode_hourly_script),
+    ):
+        seconds = min(
+            timeit.repeat(
+                lambda decoder=decoder: [decoder(script) for script in scripts],
+                number=args.number,
+                repeat=5,
+            )
+        )
+        print(f"{name:>12}: {seconds / args.number * 1e6:9.1f} us per page")
+
+
+if __name__ == "__main__":
+    main()
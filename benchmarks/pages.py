@@ -0,0 +1,149 @@
+"""Page corpus for the offline benchmarks.
+
+Recorded WetterOnline pages are read from `benchmarks/pages/*.html`, see
+`benchmarks.record`. Without recorded pages a set of synthetic pages with
+the same section layout is generated, so the benchmarks always have
+something to run on.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PAGES_DIR = Path(__file__).parent / "pages"
+# The synthetic pages show a clear night sky outside of these hours.
+NIGHT_END = 6
+NIGHT_START = 20
+
+_NAVIGATION = "".join(
+    f'<li><a href="/wetter/ort-{i}">Ort {i}</a></li>' for i in range(400)
+)
+_ADVERT = '<div class="ad"><iframe src="about:blank"></iframe>{}</div>'.format(
+    "<p>Anzeige <span>lorem ipsum dolor sit amet</span></p>" * 300
+)
+
+
+def load_recorded(directory: Path = PAGES_DIR) -> dict[str, str]:
+    """Return the recorded pages by name, none if nothing was recorded."""
+    return {
+        path.stem: path.read_text(encoding="utf-8")
+        for path in sorted(directory.glob("*.html"))
+    }
+
+
+def load_corpus(directory: Path = PAGES_DIR) -> dict[str, str]:
+    """Return the recorded pages, or synthetic ones if there are none."""
+    return load_recorded(directory) or synthetic_corpus()
+
+
+def synthetic_corpus(now: datetime | None = None) -> dict[str, str]:
+    """Return synthetic pages for a few locations, times of day and warnings.
+
+    One page has a comment before the root element, as left by caches and
+    page builders.
+    """
+    now = (now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+    day = now.replace(hour=11)
+    night = now.replace(hour=23)
+    return {
+        "berlin-day": synthetic_page(day, "Europe/Berlin", 12),
+        "berlin-night": synthetic_page(night, "Europe/Berlin", 3),
+        "warschau-day-warning": synthetic_page(day, "Europe/Warsaw", 31, warning=True),
+        "wien-night-warning": synthetic_page(night, "Europe/Vienna", -4, warning=True),
+        "zuerich-day-comment": synthetic_page(
+            day, "Europe/Zurich", 17, leading_comment=True
+        ),
+    }
+
+
+def synthetic_page(
+    now: datetime,
+    timezone: str,
+    temperature: int,
+    warning: bool = False,
+    leading_comment: bool = False,
+) -> str:
+    """Render a page with the sections WeatherUtils reads."""
+    hours = []
+    for offset in range(48 - now.hour % 24):
+        moment = now + timedelta(hours=offset)
+        night = moment.hour < NIGHT_END or moment.hour > NIGHT_START
+        symbol, text = (
+            ("mo____", "klar") if night else ("wb____", "wechselnd bew&ouml;lkt")
+        )
+        hours.append(
+            f"""<div class="hourly-item"><script>
+WO.metadata.p_city_weather.hourlyForecastElements.push({{
+    hour: {moment.hour},
+    daySynonym: "{"heute" if moment.date() == now.date() else "morgen"}",
+    windDirectionShortSector: "SW",
+    windDirection: "S&uuml;dwest",
+    windGusts: {offset % 5},
+    windSpeedKmh: {8 + offset % 9},
+    precipitationProbability: {offset * 7 % 100},
+    precipitationAmount: {offset * 7 % 100 / 50},
+    cloudCover: {offset * 13 % 100},
+    uvIndex: {max(0, 6 - abs(moment.hour - 13))},
+    temperature: {temperature + offset % 6 - 3},
+    apparentTemperature: {temperature + offset % 6 - 5},
+    humidity: {55 + offset % 30},
+    symbol: "{symbol}",
+    symbolText: "{text}",
+    docrootVersion: "2.9.34"
+}})
+</script></div>"""
+        )
+
+    dates = "".join(
+        f"<th><span>{'Heute, ' if i == 0 else ''}"
+        f"{(now + timedelta(days=i)).strftime('%d.%m.')}</span></th>"
+        for i in range(4)
+    )
+
+    def temperature_row(row_class: str, base: int) -> str:
+        cells = "".join(
+            f"<td><div><span>{row_class}</span><span>{base + i}°</span></div></td>"
+            for i in range(4)
+        )
+        return f'<tr class="{row_class}">{cells}</tr>'
+
+    def teaser_row(row_id: str, unit: str, values: list[int | str]) -> str:
+        cells = "".join(f"<td><span>\n {value}{unit}\n</span></td>" for value in values)
+        return f'<tr id="{row_id}">{cells}</tr>'
+
+    warning_banner = (
+        '<div class="warning"><h2>Unwetterwarnung</h2>'
+        + "<p>Schwere Gewitter mit Starkregen und Hagel.</p>" * 20
+        + "</div>"
+        if warning
+        else ""
+    )
+
+    comment = '<!-- generated page --><?xml-stylesheet href="x"?>\n'
+    return f"""<!DOCTYPE html>
+{comment if leading_comment else ""}<html lang="de"><head><meta charset="utf-8"><title>Wetter</title></head>
+<body><nav><ul>{_NAVIGATION}</ul></nav>{_ADVERT}{warning_banner}
+<div id="nowcast-card-temperature"><div class="value">{temperature}</div></div>
+<div id="product_display"><script>
+WO.metadata.p_city_weather.timeZone = "{timezone}";
+WO.metadata.p_city_weather.current = {{
+    "symbol": "{"mo____" if now.hour > NIGHT_START else "wb____"}",
+    "symbolText": "{"klar" if now.hour > NIGHT_START else "wechselnd bew&ouml;lkt"}",
+}};
+</script></div>
+{_ADVERT}
+<div id="hourly-container">{"".join(hours)}</div>
+{_ADVERT}
+<table id="daterow"><tr>{dates}</tr></table>
+<table id="weather">
+{temperature_row("Maximum Temperature", temperature + 2)}
+{temperature_row("Minimum Temperature", temperature - 6)}
+{teaser_row("sun_teaser", " Std.", [5, 3, 8, 1])}
+{teaser_row("precipitation_teaser", " %", [10, 60, 25, 90])}
+{teaser_row("precipitation_amount_teaser", " l/m²", ["0", "2,5", "0,4", "12"])}
+{teaser_row("wind_teaser", " km/h", [12, 20, 8, 35])}
+{teaser_row("gust_teaser", " km/h", [30, 45, 20, 70])}
+{teaser_row("cloud_teaser", " %", [40, 80, 20, 100])}
+{teaser_row("uv_teaser", "", [3, 2, 4, 1])}
+</table>
+{_ADVERT}<footer><ul>{_NAVIGATION}</ul></footer></body></html>
+"""
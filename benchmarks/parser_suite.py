@@ -0,0 +1,279 @@
+"""Offline benchmark of fetching and parsing WetterOnline pages.
+
+Every page of the corpus is served by a local stub server and run through
+each phase of a refresh: the download, the section marker scan of
+`WetterOnline.async_validate`, `html.unescape`, the soup construction, the
+construction of every parser backend and each of its extractors, and
+finally `WetterOnline.async_get_weather` end to end. The cold import of the
+parser dependencies is timed once in a fresh interpreter.
+
+For each phase the median wall time, the Python heap peak traced by
+tracemalloc and the growth of the resident memory of the process over the
+timed runs are written to a JSON file. Passing
+the file of an earlier run as `--baseline` reports the phases that got
+slower.
+
+    python -m benchmarks.parser_suite --output bench.json
+    python -m benchmarks.parser_suite --baseline bench.json
+"""
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from functools import partial
+import html
+import json
+from pathlib import Path
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from aiohttp import ClientSession
+import bs4
+
+from custom_components.wetteronline.wetteronline_api import (
+    PARSERS,
+    WeatherUtils,
+    WetterOnline,
+)
+
+from .pages import load_corpus
+from .stub_server import StubServer
+
+EXTRACTORS = ("current_observations", "daily_forecast", "hourly_forecast")
+
+
+def measure(function: Callable[[], Any], repeat: int) -> dict[str, float | None]:
+    """Return the metrics of calling `function`."""
+    timings = []
+    rss_before = rss_kib()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    rss_growth = _growth(rss_before, rss_kib())
+
+    tracemalloc.start()
+    function()
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _metrics(timings, heap_peak, rss_growth)
+
+
+async def async_measure(
+    function: Callable[[], Awaitable[Any]], repeat: int
+) -> dict[str, float | None]:
+    """Return the metrics of awaiting `function`."""
+    timings = []
+    rss_before = rss_kib()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await function()
+        timings.append(time.perf_counter() - started)
+    rss_growth = _growth(rss_before, rss_kib())
+
+    tracemalloc.start()
+    await function()
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _metrics(timings, heap_peak, rss_growth)
+
+
+def rss_kib() -> int | None:
+    """Return the current resident memory, None where /proc is missing.
+
+    The peak of getrusage covers the whole process lifetime and would
+    charge every phase with the largest one before it.
+    """
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except OSError:
+        return None
+    return pages * resource.getpagesize() // 1024
+
+
+def _growth(before: int | None, after: int | None) -> int | None:
+    if before is None or after is None:
+        return None
+    return after - before
+
+
+def _metrics(
+    timings: list[float], heap_peak: int, rss_growth: int | None
+) -> dict[str, float | None]:
+    return {
+        "wall_ms": round(statistics.median(timings) * 1000, 3),
+        "wall_min_ms": round(min(timings) * 1000, 3),
+        "heap_peak_kib": round(heap_peak / 1024, 1),
+        "rss_growth_kib": rss_growth,
+    }
+
+
+async def run(pages: dict[str, str], repeat: int) -> list[dict[str, Any]]:
+    """Benchmark every phase for every page."""
+    results: list[dict[str, Any]] = []
+
+    def record(page: str, phase: str, metrics: dict[str, float | None]) -> None:
+        results.append({"page": page, "phase": phase, **metrics})
+        print(f"{page:>24} {phase:<34} {metrics['wall_ms']:9.2f} ms")
+
+    async with StubServer(pages) as server, ClientSession() as session:
+
+        def client(name: str, **kwargs: Any) -> WetterOnline:
+            # A fresh client per run, the content hash would short-circuit
+            # every run after the first one otherwise.
+            return WetterOnline(
+                session, f"/wetter/{name}", base_url=server.base_url, **kwargs
+            )
+
+        for name, raw_html in pages.items():
+            record(
+                name,
+                "fetch",
+                await async_measure(
+                    lambda name=name: client(name).async_fetch(), repeat
+                ),
+            )
+
+            record(
+                name,
+                "validate",
+                await async_measure(
+                    lambda name=name: client(name).async_validate(), repeat
+                ),
+            )
+
+            unescaped = html.unescape(raw_html)
+            record(
+                name,
+                "unescape",
+                measure(partial(html.unescape, raw_html), repeat),
+            )
+            record(
+                name,
+                "soup",
+                measure(partial(bs4.BeautifulSoup, unescaped, "lxml"), repeat),
+            )
+
+            for backend, weather_utils_class in PARSERS.items():
+                record(
+                    name,
+                    f"{backend}.construct",
+                    measure(partial(weather_utils_class, raw_html), repeat),
+                )
+                weather_utils: WeatherUtils = weather_utils_class(raw_html)
+                weather_utils.current_observations()
+                for extractor in EXTRACTORS:
+                    record(
+                        name,
+                        f"{backend}.{extractor}",
+                        measure(getattr(weather_utils, extractor), repeat),
+                    )
+                record(
+                    name,
+                    f"{backend}.async_get_weather",
+                    await async_measure(
+                        lambda name=name, backend=backend: client(
+                            name, parser=backend
+                        ).async_get_weather(),
+                        repeat,
+                    ),
+                )
+
+            record(
+                name,
+                "streaming.async_get_weather",
+                await async_measure(
+                    lambda name=name: client(name, streaming=True).async_get_weather(),
+                    repeat,
+                ),
+            )
+
+    return results
+
+
+def cold_import_seconds() -> dict[str, float]:
+    """Return the import seconds of the parser dependencies in a fresh process."""
+    script = (
+        "import json\n"
+        "from custom_components.wetteronline import wetteronline_api as api\n"
+        "api.import_parser_module('lxml.etree')\n"
+        "api.import_parser_module('bs4')\n"
+        "print(json.dumps(api.IMPORT_SECONDS))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def compare(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    threshold: float,
+    min_delta_ms: float,
+) -> list[str]:
+    """Return the phases that got slower than `threshold` times the baseline.
+
+    Phases slower by less than `min_delta_ms` are ignored as noise.
+    """
+    previous = {(item["page"], item["phase"]): item for item in baseline}
+    regressions = []
+    for item in results:
+        if (before := previous.get((item["page"], item["phase"]))) is None:
+            continue
+        if (
+            item["wall_ms"] - before["wall_ms"] >= min_delta_ms
+            and item["wall_ms"] > before["wall_ms"] * threshold
+        ):
+            regressions.append(
+                f"{item['page']} {item['phase']}: "
+                f"{before['wall_ms']:.2f} ms -> {item['wall_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    """Run the suite."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=Path("bench_output.json"))
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    pages = load_corpus()
+    results = asyncio.run(run(pages, args.repeat))
+    args.output.write_text(
+        json.dumps(
+            {
+                "python": sys.version,
+                "platform": platform.platform(),
+                "bs4": bs4.__version__,
+                "pages": {name: len(page) for name, page in pages.items()},
+                "import_seconds": cold_import_seconds(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        if regressions := compare(results, baseline, args.threshold, args.min_delta_ms):
+            print("Regressions:", *regressions, sep="\n  ")
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
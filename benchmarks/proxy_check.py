@@ -0,0 +1,188 @@
+"""Offline check of the caching proxy against the stub server.
+
+Every page of the corpus is served by a local stub server, a `CacheProxy`
+is put in front of it and several clients standing in for Home Assistant
+instances fetch every location through the proxy. The data each client
+gets has to equal the data of parsing the page directly, and the stub
+server must have seen one request per location only. Finally unknown
+locations and an outage of the stub server must neither reach the
+upstream again while backing off nor take up cache slots.
+
+    python -m benchmarks.proxy_check --instances 5
+"""
+
+import argparse
+import asyncio
+from http import HTTPStatus
+import logging
+import sys
+import time
+
+from aiohttp import ClientResponseError, ClientSession, hdrs, web
+
+from custom_components.wetteronline.wetteronline_api import (
+    OUTCOME_NOT_MODIFIED,
+    PROXY_WEATHER_PATH,
+    SingleFlight,
+    WetterOnline,
+    parse_weather,
+)
+from proxy.server import CacheProxy
+
+from .pages import load_corpus
+from .stub_server import StubServer
+
+
+async def run(pages: dict[str, str], instances: int) -> list[str]:
+    """Fetch every page through the proxy, return the problems found."""
+    problems: list[str] = []
+    async with StubServer(pages) as server, ClientSession() as session:
+        proxy = CacheProxy(session, upstream=server.base_url)
+        runner = web.AppRunner(proxy.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        proxy_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+        # Without a coalescing TTL every call of a client reaches the proxy.
+        clients = [
+            WetterOnline(
+                session,
+                f"/wetter/{name}",
+                single_flight=SingleFlight(ttl=0),
+                proxy_url=proxy_url,
+            )
+            for _ in range(instances)
+            for name in pages
+        ]
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(client.async_get_weather() for client in clients)
+        )
+        print(
+            f"{len(clients)} fetches through the proxy in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms, "
+            f"{server.requests} upstream requests"
+        )
+        for client, data in zip(clients, results, strict=True):
+            if data != parse_weather(pages[client.url.rsplit("/", 1)[1]]):
+                problems.append(f"{client.url}: data differs from a direct parse")
+        if server.requests != len(pages):
+            problems.append(
+                f"{server.requests} upstream requests for {len(pages)} locations"
+            )
+
+        # A second round within the interval is answered with 304.
+        await asyncio.gather(*(client.async_get_weather() for client in clients))
+        not_modified = sum(
+            client.timings.last.outcome == OUTCOME_NOT_MODIFIED for client in clients
+        )
+        print(f"{not_modified} of {len(clients)} refetches not modified")
+        if not_modified != len(clients):
+            problems.append("refetches within the interval were not 304")
+
+        problems += await check_if_none_match(session, proxy, proxy_url)
+        problems += await check_unknown(session, server, proxy, proxy_url, len(pages))
+        problems += await check_outage(server, proxy, clients, len(pages))
+
+        await runner.cleanup()
+    return problems
+
+
+async def check_if_none_match(
+    session: ClientSession, proxy: CacheProxy, proxy_url: str
+) -> list[str]:
+    """Check that If-None-Match is matched tag by tag, weakly, and * matches."""
+    problems: list[str] = []
+    url, location = next(iter(proxy.locations.items()))
+    for if_none_match, status in (
+        (location.etag, 304),
+        (f"W/{location.etag}", 304),
+        (f'"other", {location.etag}', 304),
+        ("*", 304),
+        ('"other"', 200),
+        (f'"x{location.etag[1:]}', 200),
+    ):
+        async with session.get(
+            f"{proxy_url}{PROXY_WEATHER_PATH}",
+            params={"url": url},
+            headers={hdrs.IF_NONE_MATCH: if_none_match},
+        ) as resp:
+            if resp.status != status:
+                problems.append(
+                    f"If-None-Match {if_none_match}: {resp.status} instead of {status}"
+                )
+    return problems
+
+
+async def check_unknown(
+    session: ClientSession,
+    server: StubServer,
+    proxy: CacheProxy,
+    proxy_url: str,
+    locations: int,
+) -> list[str]:
+    """Check that unknown locations fail once and are not retried right away."""
+    problems: list[str] = []
+    bogus = [
+        WetterOnline(
+            session,
+            f"/wetter/unknown-{i}",
+            single_flight=SingleFlight(ttl=0),
+            proxy_url=proxy_url,
+        )
+        for i in range(3)
+    ]
+    before = server.requests
+    for _ in range(3):
+        for client in bogus:
+            try:
+                await client.async_get_weather()
+            except ClientResponseError as error:
+                if error.status != HTTPStatus.BAD_GATEWAY:
+                    problems.append(f"{client.url}: {error.status} instead of 502")
+            else:
+                problems.append(f"{client.url}: no error for an unknown page")
+    print(f"{server.requests - before} upstream requests for {len(bogus)} unknown")
+    if server.requests - before != len(bogus):
+        problems.append("unknown locations were retried while backing off")
+    if len(proxy.locations) != locations:
+        problems.append("unknown locations were cached")
+    return problems
+
+
+async def check_outage(
+    server: StubServer, proxy: CacheProxy, clients: list[WetterOnline], locations: int
+) -> list[str]:
+    """Check that cached data is served stale during an outage, without retries."""
+    server.failure_rate = 1.0
+    # Age the cached data by an interval, every location wants a refresh.
+    for location in proxy.locations.values():
+        location.fetched_at -= proxy._interval
+    proxy._single_flight.ttl = 0
+    before = server.requests
+    for _ in range(3):
+        await asyncio.gather(*(client.async_get_weather() for client in clients))
+    print(f"{server.requests - before} upstream requests during the outage")
+    if server.requests - before != locations:
+        return ["failing locations were retried while backing off"]
+    return []
+
+
+def main() -> None:
+    """Run the check."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--instances", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    problems = asyncio.run(run(load_corpus(), args.instances))
+    for problem in problems:
+        print(problem)
+    sys.exit(bool(problems))
+
+
+if __name__ == "__main__":
+    main()
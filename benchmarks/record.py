@@ -0,0 +1,40 @@
+"""Record WetterOnline pages into the benchmark corpus.
+
+python -m benchmarks.record berlin=/wetter/berlin wien=/wetter/wien
+"""
+
+import argparse
+import asyncio
+
+from aiohttp import ClientSession
+
+from custom_components.wetteronline.wetteronline_api import BASE_URL, HTTP_HEADERS
+
+from .pages import PAGES_DIR
+
+
+async def record(pages: dict[str, str]) -> None:
+    """Download every `name=url` page into `PAGES_DIR`."""
+    PAGES_DIR.mkdir(exist_ok=True)
+    async with ClientSession() as session:
+        for name, url in pages.items():
+            async with session.get(
+                f"{BASE_URL}/{url.lstrip('/')}", headers=HTTP_HEADERS
+            ) as resp:
+                resp.raise_for_status()
+                body = await resp.text()
+            path = PAGES_DIR / f"{name}.html"
+            path.write_text(body, encoding="utf-8")
+            print(f"{path}: {len(body)} characters")
+
+
+def main() -> None:
+    """Record the pages given on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pages", nargs="+", metavar="NAME=URL")
+    args = parser.parse_args()
+    asyncio.run(record(dict(page.split("=", 1) for page in args.pages)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""Offline soak test of the integration with many locations and subscribers.
+
+N config entries are set up in a Home Assistant instance against the local
+stub server, with M forecast subscribers on every weather entity. Once all
+locations are set up, time runs `--speedup` times faster than the wall
+clock: the event loop clock and the clock of Home Assistant are scaled, so
+update intervals, backoff, the request budget and the latency of the stub
+server all pass in simulated time. The synthetic pages change every
+simulated hour.
+
+For every simulated hour the CPU seconds, the resident memory, the size of
+the forecast history files, the refreshes of the forecast coordinators and
+their durations, the failed refreshes, the forecast notifications and the
+event loop lag are reported. Durations and loop lag are wall time, the
+simulated waits within a refresh pass `--speedup` times faster. CPU work
+takes `--speedup` times longer in simulated time, too high a speedup runs
+into the network and parse timeouts.
+
+Needs pytest-homeassistant-custom-component for the Home Assistant test
+instance.
+
+    python -m benchmarks.soak --locations 50 --subscribers 10 --hours 24
+    python -m benchmarks.soak --latency 0.5 --failure-rate 0.05 --speedup 120
+"""
+
+import argparse
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta, tzinfo
+from functools import partial
+import json
+import logging
+from pathlib import Path
+import resource
+import selectors
+import tempfile
+import threading
+import time
+from typing import Any
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from aiohttp import ThreadedResolver
+from homeassistant import loader
+from homeassistant.components.weather import DATA_COMPONENT
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.wetteronline.const import (
+    CONF_NOWCAST_INTERVAL,
+    CONF_PARSER,
+    CONF_REQUESTS_PER_HOUR,
+    CONF_URL_WETTERONLINE,
+    DEFAULT_REQUESTS_PER_HOUR,
+    DOMAIN,
+    SIGNAL_REFRESHED,
+)
+from custom_components.wetteronline.wetteronline_api import (
+    DEFAULT_PARSER,
+    PARSER_AUTO,
+    PARSERS,
+    WetterOnline,
+)
+
+from .pages import synthetic_page
+from .stub_server import StubServer
+
+TIMEZONES = ("Europe/Berlin", "Europe/Vienna", "Europe/Warsaw")
+HOUR = 3600
+
+
+class _ScaledSelector(selectors.DefaultSelector):
+    """Selector waiting `speedup` times shorter than asked."""
+
+    speedup = 1.0
+
+    def select(self, timeout: float | None = None) -> list[Any]:
+        if timeout is not None:
+            timeout /= self.speedup
+        return super().select(timeout)
+
+
+class SimulatedLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock runs `speedup` times faster than the wall clock.
+
+    It starts at the speed of the wall clock.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._scaled_selector = _ScaledSelector()
+        self._wall_anchor = self._anchor = time.monotonic()
+        super().__init__(self._scaled_selector)
+
+    @property
+    def speedup(self) -> float:
+        """Return how much faster than the wall clock the clock runs."""
+        return self._scaled_selector.speedup
+
+    def set_speedup(self, speedup: float) -> None:
+        """Change the speed of the clock from now on."""
+        self._anchor, self._wall_anchor = self.time(), time.monotonic()
+        self._scaled_selector.speedup = speedup
+
+    def time(self) -> float:
+        """Return the simulated monotonic time."""
+        return self._anchor + (time.monotonic() - self._wall_anchor) * self.speedup
+
+
+class SimulatedClock:
+    """Wall clock following the simulated time of a `SimulatedLoop`."""
+
+    def __init__(self, loop: SimulatedLoop) -> None:
+        """Initialize."""
+        self._loop = loop
+        self._origin = loop.time()
+        self._started = datetime.now(UTC)
+
+    def utcnow(self) -> datetime:
+        """Return the simulated time in UTC."""
+        return self._started + timedelta(seconds=self._loop.time() - self._origin)
+
+    def now(self, time_zone: tzinfo | None = None) -> datetime:
+        """Return the simulated time in `time_zone`."""
+        return self.utcnow().astimezone(time_zone or dt_util.get_default_time_zone())
+
+    def timestamp(self) -> float:
+        """Return the simulated time as POSIX timestamp."""
+        return self.utcnow().timestamp()
+
+    @contextmanager
+    def patched(self) -> Iterator[None]:
+        """Make Home Assistant use the simulated time."""
+        with (
+            patch("homeassistant.util.dt.utcnow", self.utcnow),
+            patch("homeassistant.util.dt.now", self.now),
+            patch("homeassistant.helpers.event.time_tracker_utcnow", self.utcnow),
+            patch("homeassistant.helpers.event.time_tracker_timestamp", self.timestamp),
+        ):
+            yield
+
+
+def _local_resolver(hass: HomeAssistant) -> ThreadedResolver:
+    """Return a resolver without zeroconf, the stub server is on localhost."""
+    resolver = ThreadedResolver()
+    resolver.real_close = resolver.close
+    return resolver
+
+
+class LoopLagProbe:
+    """Measure from a thread how late the event loop runs a callback."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float) -> None:
+        """Initialize."""
+        self._loop = loop
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._samples: list[float] = []
+
+    def start(self) -> None:
+        """Start probing."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop probing."""
+        self._stop.set()
+        self._thread.join()
+
+    def take(self) -> list[float]:
+        """Return and reset the lag samples in seconds."""
+        samples, self._samples = self._samples, []
+        return samples
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self._loop.call_soon_threadsafe(self._arrived, time.perf_counter())
+
+    def _arrived(self, sent: float) -> None:
+        self._samples.append(time.perf_counter() - sent)
+
+
+class Sampler:
+    """Collect the metrics of one simulated hour after another."""
+
+    def __init__(self, hass: HomeAssistant, probe: LoopLagProbe) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._probe = probe
+        self.refresh_seconds: list[float] = []
+        self.failures = 0
+        self.notifications = 0
+        self.forecast_items = 0
+        self._wall = time.perf_counter()
+        self._cpu = _cpu_seconds()
+
+    @callback
+    def refreshed(self, coordinator: Any) -> None:
+        """Record a refresh of the forecast coordinator."""
+        if not coordinator.last_update_success:
+            self.failures += 1
+        if (timing := coordinator.wetteronline.timings.last) is not None:
+            self.refresh_seconds.append(timing.phases.get("total", 0.0))
+
+    @callback
+    def notified(self, forecast: list[Any] | None) -> None:
+        """Record a forecast sent to a subscriber."""
+        self.notifications += 1
+        self.forecast_items += len(forecast or ())
+
+    async def sample(self, hour: int) -> dict[str, Any]:
+        """Return the metrics since the last sample and reset them."""
+        wall, cpu = time.perf_counter(), _cpu_seconds()
+        history_bytes = await self._hass.async_add_executor_job(
+            _history_bytes, self._hass
+        )
+        lag = self._probe.take()
+        sample = {
+            "hour": hour,
+            "wall_s": round(wall - self._wall, 3),
+            "cpu_s": round(cpu - self._cpu, 3),
+            "rss_mib": _rss_mib(),
+            "history_kib": round(history_bytes / 1024, 1),
+            "refreshes": len(self.refresh_seconds),
+            "failures": self.failures,
+            "notifications": self.notifications,
+            "forecast_items": self.forecast_items,
+            **_percentiles("refresh_ms", self.refresh_seconds),
+            **_percentiles("lag_ms", lag),
+        }
+        self._wall, self._cpu = wall, cpu
+        self.refresh_seconds = []
+        self.failures = self.notifications = self.forecast_items = 0
+        return sample
+
+
+def _percentiles(name: str, values: list[float]) -> dict[str, float | None]:
+    ordered = sorted(values)
+    result: dict[str, float | None] = {}
+    for label, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        result[f"{name}_{label}"] = (
+            round(ordered[int(quantile * (len(ordered) - 1))] * 1000, 2)
+            if ordered
+            else None
+        )
+    result[f"{name}_max"] = round(ordered[-1] * 1000, 2) if ordered else None
+    return result
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _rss_mib() -> float | None:
+    """Return the current resident memory, None where /proc is missing.
+
+    The peak of getrusage never shrinks and would hide whether the memory
+    levels off, so it is no stand-in.
+    """
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except OSError:
+        return None
+    return round(pages * resource.getpagesize() / 2**20, 1)
+
+
+def _history_bytes(hass: HomeAssistant) -> int:
+    return sum(
+        entry.runtime_data.history.size()
+        for entry in hass.config_entries.async_loaded_entries(DOMAIN)
+    )
+
+
+def render_pages(locations: int, now: datetime) -> dict[str, str]:
+    """Return the synthetic page of every location at `now`."""
+    pages = {}
+    for index in range(locations):
+        timezone = TIMEZONES[index % len(TIMEZONES)]
+        local = now.astimezone(ZoneInfo(timezone)).replace(tzinfo=None)
+        temperature = index % 25 + local.hour % 7 - 3
+        pages[f"loc-{index}"] = synthetic_page(local, timezone, temperature)
+    return pages
+
+
+async def soak(args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Run the soak test, return one sample per simulated hour."""
+    loop = asyncio.get_running_loop()
+    assert isinstance(loop, SimulatedLoop)
+    clock = SimulatedClock(loop)
+    samples: list[dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory() as config_dir, clock.patched():
+        pages = render_pages(args.locations, clock.utcnow())
+        async with (
+            StubServer(pages, args.latency, seed=args.seed) as server,
+            async_test_home_assistant(config_dir=config_dir) as hass,
+        ):
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+            probe = LoopLagProbe(loop, args.probe_interval)
+            sampler = Sampler(hass, probe)
+            with (
+                patch(
+                    "homeassistant.helpers.aiohttp_client._async_make_resolver",
+                    _local_resolver,
+                ),
+                patch(
+                    "custom_components.wetteronline.WetterOnline",
+                    partial(WetterOnline, base_url=server.base_url),
+                ),
+            ):
+                for index in range(args.locations):
+                    entry = MockConfigEntry(
+                        domain=DOMAIN,
+                        data={
+                            CONF_URL_WETTERONLINE: f"/wetter/loc-{index}",
+                            CONF_NAME: f"Soak {index}",
+                        },
+                        options={
+                            CONF_PARSER: args.parser,
+                            CONF_REQUESTS_PER_HOUR: args.requests_per_hour,
+                            CONF_NOWCAST_INTERVAL: args.nowcast_interval,
+                        },
+                        unique_id=f"Soak {index}",
+                    )
+                    entry.add_to_hass(hass)
+                    await hass.config_entries.async_setup(entry.entry_id)
+                    if entry.state is not ConfigEntryState.LOADED:
+                        raise RuntimeError(f"Setting up {entry.unique_id} failed")
+                    entry.async_on_unload(
+                        async_dispatcher_connect(
+                            hass,
+                            SIGNAL_REFRESHED.format(entry.entry_id),
+                            partial(sampler.refreshed, entry.runtime_data),
+                        )
+                    )
+
+                for entity in hass.data[DATA_COMPONENT].entities:
+                    for subscriber in range(args.subscribers):
+                        entity.async_subscribe_forecast(
+                            ("hourly", "daily")[subscriber % 2], sampler.notified
+                        )
+
+                print(
+                    f"{args.locations} locations, {args.subscribers} subscribers "
+                    f"each, {args.speedup:g}x speed"
+                )
+                # The locations are set up in real time, the first refresh
+                # pays for importing and ranking the parsers.
+                loop.set_speedup(args.speedup)
+                server.failure_rate = args.failure_rate
+                await sampler.sample(0)
+                probe.start()
+                try:
+                    for hour in range(1, args.hours + 1):
+                        await asyncio.sleep(HOUR)
+                        samples.append(sample := await sampler.sample(hour))
+                        print(_format(sample))
+                        server.pages.update(
+                            (name, page.encode())
+                            for name, page in render_pages(
+                                args.locations, clock.utcnow()
+                            ).items()
+                        )
+                finally:
+                    probe.stop()
+                    # Unloading stops the coordinators and waits for their
+                    # refreshes, which would otherwise run into the closed
+                    # session while Home Assistant stops.
+                    for entry in hass.config_entries.async_entries(DOMAIN):
+                        await hass.config_entries.async_unload(entry.entry_id)
+                    await hass.async_block_till_done()
+                    await hass.async_stop(force=True)
+    return samples
+
+
+def _format(sample: dict[str, Any]) -> str:
+    return (
+        f"hour {sample['hour']:>3}  wall {sample['wall_s']:7.2f} s  "
+        f"cpu {sample['cpu_s']:7.2f} s  rss {sample['rss_mib']!s:>7} MiB  "
+        f"refreshes {sample['refreshes']:>5} ({sample['failures']} failed)  "
+        f"refresh p50/p99 {sample['refresh_ms_p50']}/{sample['refresh_ms_p99']} ms  "
+        f"lag p99/max {sample['lag_ms_p99']}/{sample['lag_ms_max']} ms  "
+        f"notified {sample['notifications']}"
+    )
+
+
+def growth(samples: list[dict[str, Any]]) -> dict[str, float | None]:
+    """Return the growth from the first to the last simulated hour."""
+    first, last = samples[0], samples[-1]
+    return {
+        "rss_mib": (
+            round(last["rss_mib"] - first["rss_mib"], 1)
+            if None not in (first["rss_mib"], last["rss_mib"])
+            else None
+        ),
+        "cpu_s_per_hour_growth": round(last["cpu_s"] - first["cpu_s"], 3),
+        "history_kib": round(last["history_kib"] - first["history_kib"], 1),
+    }
+
+
+def main() -> None:
+    """Run the soak test."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--locations", type=int, default=20)
+    parser.add_argument("--subscribers", type=int, default=4)
+    parser.add_argument("--hours", type=int, default=6)
+    parser.add_argument("--speedup", type=float, default=60.0)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--parser", choices=[PARSER_AUTO, *PARSERS], default=DEFAULT_PARSER
+    )
+    parser.add_argument(
+        "--requests-per-hour", type=int, default=DEFAULT_REQUESTS_PER_HOUR
+    )
+    parser.add_argument("--nowcast-interval", type=int, default=0)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--output", type=Path, default=Path("soak_output.json"))
+    # Failed refreshes are counted, not logged, unless asked for.
+    parser.add_argument("--log-level", default="CRITICAL")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+
+    with asyncio.Runner(loop_factory=SimulatedLoop) as runner:
+        samples = runner.run(soak(args))
+    if not samples:
+        return
+    args.output.write_text(
+        json.dumps(
+            {
+                "arguments": {
+                    key: value
+                    for key, value in vars(args).items()
+                    if key not in ("output", "log_level")
+                },
+                "growth": growth(samples),
+                "samples": samples,
+            },
+            indent=2,
+        )
+    )
+    print(f"Growth: {growth(samples)}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
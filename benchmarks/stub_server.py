@@ -0,0 +1,59 @@
+"""Local stand-in for the WetterOnline web server."""
+
+import asyncio
+import random
+from typing import Self
+
+from aiohttp import web
+
+
+class StubServer:
+    """Serve pages at `/wetter/<name>` on localhost.
+
+    Every response can be delayed by `latency` seconds and fails with a
+    503 with probability `failure_rate`.
+    """
+
+    def __init__(
+        self,
+        pages: dict[str, str],
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize."""
+        self.pages = {name: page.encode() for name, page in pages.items()}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    async def __aenter__(self) -> Self:
+        """Start serving on a free port."""
+        app = web.Application()
+        app.router.add_get("/wetter/{name}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop serving."""
+        assert self._runner is not None
+        await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._random.random() < self.failure_rate:
+            return web.Response(status=503)
+        body = self.pages.get(request.match_info["name"])
+        if body is None:
+            return web.Response(status=404)
+        return web.Response(body=body, content_type="text/html", charset="utf-8")
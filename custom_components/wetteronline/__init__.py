@@ -2,20 +2,38 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
 import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME, Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import CONF_URL_WETTERONLINE, UPDATE_INTERVAL_WETTERONLINE
-from .coordinator import WeatherOnlineDataUpdateCoordinator
-from .wetteronline_api import WetterOnline
+from .const import (
+    CONF_NOWCAST_INTERVAL,
+    CONF_PARSE_EXECUTOR,
+    CONF_PARSER,
+    CONF_PROXY_URL,
+    CONF_REQUESTS_PER_HOUR,
+    CONF_STREAMING,
+    CONF_URL_WETTERONLINE,
+    DEFAULT_NOWCAST_INTERVAL,
+    DEFAULT_PARSE_EXECUTOR,
+    DEFAULT_REQUESTS_PER_HOUR,
+    UPDATE_INTERVAL_WETTERONLINE,
+)
+from .coordinator import (
+    WeatherOnlineDataUpdateCoordinator,
+    WetterOnlineNowcastCoordinator,
+    forecast_history,
+    snapshot_store,
+)
+from .scheduler import async_acquire_scheduler
+from .wetteronline_api import DEFAULT_PARSER, WetterOnline
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = [Platform.WEATHER]
+PLATFORMS = [Platform.SENSOR, Platform.WEATHER]
 
 
 type WetterOnlineConfigEntry = ConfigEntry[WeatherOnlineDataUpdateCoordinator]
@@ -30,24 +48,77 @@ async def async_setup_entry(
 
     _LOGGER.debug("Using url: %s", url)
 
-    websession = async_get_clientsession(hass)
-    wetteronline = WetterOnline(websession, url)
+    scheduler = async_acquire_scheduler(hass, entry)
+    wetteronline = WetterOnline(
+        scheduler.session,
+        url,
+        scheduler.executor(
+            entry.options.get(CONF_PARSE_EXECUTOR, DEFAULT_PARSE_EXECUTOR)
+        ),
+        parser=entry.options.get(CONF_PARSER, DEFAULT_PARSER),
+        streaming=entry.options.get(CONF_STREAMING, False),
+        fetch_slot=scheduler.async_fetch_slot,
+        single_flight=scheduler.single_flight,
+        proxy_url=entry.options.get(CONF_PROXY_URL) or None,
+        collect_executor=scheduler.collect_executor,
+    )
 
     coordinator = WeatherOnlineDataUpdateCoordinator(
-        hass, wetteronline, name, UPDATE_INTERVAL_WETTERONLINE
+        hass,
+        entry,
+        wetteronline,
+        name,
+        UPDATE_INTERVAL_WETTERONLINE,
+        entry.options.get(CONF_REQUESTS_PER_HOUR, DEFAULT_REQUESTS_PER_HOUR),
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    # Come up with the last saved data right away and refresh in the
+    # background, only block on the network without a fresh snapshot.
+    if await coordinator.async_load_snapshot():
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{name} initial refresh"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+
+    # Tiered mode, the current observations are refreshed on their own.
+    if nowcast_interval := entry.options.get(
+        CONF_NOWCAST_INTERVAL, DEFAULT_NOWCAST_INTERVAL
+    ):
+        coordinator.nowcast = WetterOnlineNowcastCoordinator(
+            hass, entry, coordinator, timedelta(minutes=nowcast_interval)
+        )
+        coordinator.nowcast.async_set_updated_data(
+            coordinator.data.current_observations
+        )
 
     entry.runtime_data = coordinator
+    entry.async_on_unload(coordinator.async_flush_snapshot)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
     return True
 
 
+async def _async_update_listener(
+    hass: HomeAssistant, entry: WetterOnlineConfigEntry
+) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(
     hass: HomeAssistant, entry: WetterOnlineConfigEntry
 ) -> bool:
     """Unload a config entry."""
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+
+async def async_remove_entry(
+    hass: HomeAssistant, entry: WetterOnlineConfigEntry
+) -> None:
+    """Remove the snapshot and forecast history of a deleted config entry."""
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    await hass.async_add_executor_job(forecast_history(hass, entry.entry_id).remove)
@@ -0,0 +1,160 @@
+"""Refresh interval following the publication cadence of WetterOnline."""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from itertools import pairwise
+import math
+import random
+import statistics
+from typing import Any
+
+from aiohttp import ClientResponseError, hdrs
+
+from .const import (
+    CHANGE_HISTORY,
+    ERROR_BACKOFF,
+    LATE_POLL_INTERVAL,
+    MAX_BACKOFF,
+    MAX_UPDATE_INTERVAL,
+    MIN_CHANGES,
+    MIN_UPDATE_INTERVAL,
+    PUBLISH_GRACE,
+)
+
+BUDGET_WINDOW = timedelta(hours=1)
+
+
+class RefreshCadence:
+    """Learn when a page is republished and when to poll it next.
+
+    The publication period is the median distance between the last
+    content changes. The next poll is placed `PUBLISH_GRACE` after the
+    next expected publication. When an expected publication is late the
+    page is polled every `LATE_POLL_INTERVAL` for half a period. Changes
+    without a Last-Modified time are only known up to the poll that saw
+    them, the interval then never exceeds the base interval. Errors
+    back off exponentially with jitter and honour Retry-After. No interval
+    ever lets the requests of the last hour exceed `requests_per_hour`.
+    """
+
+    def __init__(
+        self,
+        base_interval: timedelta,
+        requests_per_hour: int,
+        rng: random.Random | None = None,
+    ) -> None:
+        """Initialize."""
+        self.base_interval = base_interval
+        self.requests_per_hour = requests_per_hour
+        self.errors = 0
+        self._dated = True
+        self._changes: deque[datetime] = deque(maxlen=CHANGE_HISTORY)
+        self._requests: deque[datetime] = deque()
+        self._random = rng or random.Random()
+
+    @property
+    def period(self) -> timedelta | None:
+        """Return the learned publication period, None while learning."""
+        if len(self._changes) < MIN_CHANGES:
+            return None
+        period = statistics.median(b - a for a, b in pairwise(self._changes))
+        return min(max(period, MIN_UPDATE_INTERVAL), MAX_UPDATE_INTERVAL)
+
+    def budget_exhausted(self, now: datetime, reserve: int = 0) -> bool:
+        """Return True when another request now would exceed the budget.
+
+        `reserve` requests of the budget are kept back for others.
+        """
+        self._expire(now)
+        return len(self._requests) >= self.requests_per_hour - reserve
+
+    def record_request(self, now: datetime) -> None:
+        """Count a request against the budget."""
+        self._requests.append(now)
+
+    def record_success(
+        self, now: datetime, changed: bool, published_at: datetime | None = None
+    ) -> timedelta:
+        """Learn from a successful refresh and return the next interval.
+
+        `published_at` is the Last-Modified time of the page if the server
+        sent one, otherwise the change is dated to `now`.
+        """
+        self.errors = 0
+        if changed:
+            last = self._changes[-1] if self._changes else None
+            if published_at is None or published_at > now:
+                published_at = now
+                self._dated = False
+            if last is None or published_at > last:
+                self._changes.append(published_at)
+        return self.next_interval(now)
+
+    def record_error(
+        self, now: datetime, retry_after: timedelta | None = None
+    ) -> timedelta:
+        """Return the interval to back off after a failed refresh."""
+        self.errors += 1
+        backoff = min(ERROR_BACKOFF * 2 ** (self.errors - 1), MAX_BACKOFF)
+        # Equal jitter, locations failing together do not retry together.
+        interval = backoff * self._random.uniform(0.5, 1)
+        if retry_after is not None:
+            interval = max(interval, retry_after)
+        return self._within_budget(now, interval)
+
+    def next_interval(self, now: datetime) -> timedelta:
+        """Return the interval until the next poll."""
+        if (period := self.period) is None:
+            return self._within_budget(now, self.base_interval)
+
+        last_change = self._changes[-1]
+        cycles = max(math.ceil((now - last_change) / period), 1)
+        expected = last_change + cycles * period
+        missed = expected - period
+        if cycles > 1 and now - missed < period / 2:
+            interval = LATE_POLL_INTERVAL
+        else:
+            interval = expected + PUBLISH_GRACE - now
+        upper = MAX_UPDATE_INTERVAL if self._dated else self.base_interval
+        interval = min(max(interval, MIN_UPDATE_INTERVAL), upper)
+        return self._within_budget(now, interval)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state for diagnostics."""
+        period = self.period
+        return {
+            "period_seconds": period.total_seconds() if period else None,
+            "changes": [change.isoformat() for change in self._changes],
+            "errors": self.errors,
+            "requests_last_hour": len(self._requests),
+            "requests_per_hour": self.requests_per_hour,
+        }
+
+    def _within_budget(self, now: datetime, interval: timedelta) -> timedelta:
+        self._expire(now)
+        if len(self._requests) < self.requests_per_hour:
+            return interval
+        # Wait until enough requests dropped out of the window for one more.
+        oldest_to_expire = self._requests[len(self._requests) - self.requests_per_hour]
+        return max(interval, oldest_to_expire + BUDGET_WINDOW - now)
+
+    def _expire(self, now: datetime) -> None:
+        while self._requests and self._requests[0] <= now - BUDGET_WINDOW:
+            self._requests.popleft()
+
+
+def retry_after(error: BaseException, now: datetime) -> timedelta | None:
+    """Return the Retry-After of a failed response, if the server sent one."""
+    if not isinstance(error, ClientResponseError) or not error.headers:
+        return None
+    if (value := error.headers.get(hdrs.RETRY_AFTER)) is None:
+        return None
+    if value.isdigit():
+        return timedelta(seconds=int(value))
+    try:
+        return parsedate_to_datetime(value) - now
+    except (TypeError, ValueError):
+        return None
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-from asyncio import timeout
 import logging
 from typing import Any
 
@@ -10,12 +9,32 @@ from aiohttp import ClientError
 from aiohttp.client_exceptions import ClientConnectorError
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_NAME
+from homeassistant.core import callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import CONF_URL_WETTERONLINE, DOMAIN
-from .wetteronline_api import WetterOnline
+from .const import (
+    CONF_NOWCAST_INTERVAL,
+    CONF_PARSE_EXECUTOR,
+    CONF_PARSER,
+    CONF_PROXY_URL,
+    CONF_REQUESTS_PER_HOUR,
+    CONF_STREAMING,
+    CONF_URL_WETTERONLINE,
+    DEFAULT_NOWCAST_INTERVAL,
+    DEFAULT_PARSE_EXECUTOR,
+    DEFAULT_REQUESTS_PER_HOUR,
+    DOMAIN,
+    PARSE_EXECUTOR_PROCESS,
+    PARSE_EXECUTOR_THREAD,
+)
+from .wetteronline_api import DEFAULT_PARSER, PARSER_AUTO, PARSERS, WetterOnline
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,6 +44,12 @@ class WetterOnlineFlowHandler(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return WetterOnlineOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -32,23 +57,31 @@ class WetterOnlineFlowHandler(ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
+            self._async_abort_entries_match(
+                {CONF_URL_WETTERONLINE: user_input[CONF_URL_WETTERONLINE]}
+            )
             websession = async_get_clientsession(self.hass)
             try:
-                async with timeout(10):
-                    wetteronline = WetterOnline(
-                        websession, user_input[CONF_URL_WETTERONLINE]
-                    )
-                    await wetteronline.async_get_weather()
+                wetteronline = WetterOnline(
+                    websession, user_input[CONF_URL_WETTERONLINE]
+                )
+                # Only look for the section markers, the first refresh of
+                # the entry parses the page.
+                await wetteronline.async_validate()
 
             except (ClientConnectorError, TimeoutError, ClientError):
                 _LOGGER.exception("Cannot connect")
                 errors["base"] = "cannot_connect"
-            except Exception as e:
+            except ValueError:
+                _LOGGER.exception("Not a WetterOnline weather page")
+                errors["base"] = "invalid_page"
+            except Exception:
                 _LOGGER.exception("Error occurred")
                 errors["base"] = "other_error"
             else:
                 unique_id = user_input[CONF_NAME]
                 await self.async_set_unique_id(unique_id, raise_on_progress=False)
+                self._abort_if_unique_id_configured()
                 return self.async_create_entry(
                     title=user_input[CONF_NAME], data=user_input
                 )
@@ -65,3 +98,53 @@ class WetterOnlineFlowHandler(ConfigFlow, domain=DOMAIN):
             ),
             errors=errors,
         )
+
+
+class WetterOnlineOptionsFlow(OptionsFlow):
+    """Options flow for WetterOnline."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_PARSE_EXECUTOR,
+                        default=options.get(
+                            CONF_PARSE_EXECUTOR, DEFAULT_PARSE_EXECUTOR
+                        ),
+                    ): vol.In([PARSE_EXECUTOR_THREAD, PARSE_EXECUTOR_PROCESS]),
+                    vol.Optional(
+                        CONF_PARSER,
+                        default=options.get(CONF_PARSER, DEFAULT_PARSER),
+                    ): vol.In([PARSER_AUTO, *PARSERS]),
+                    vol.Optional(
+                        CONF_STREAMING,
+                        default=options.get(CONF_STREAMING, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_REQUESTS_PER_HOUR,
+                        default=options.get(
+                            CONF_REQUESTS_PER_HOUR, DEFAULT_REQUESTS_PER_HOUR
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                    vol.Optional(
+                        CONF_NOWCAST_INTERVAL,
+                        default=options.get(
+                            CONF_NOWCAST_INTERVAL, DEFAULT_NOWCAST_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=60)),
+                    vol.Optional(
+                        CONF_PROXY_URL,
+                        default=options.get(CONF_PROXY_URL, ""),
+                    ): str,
+                }
+            ),
+        )
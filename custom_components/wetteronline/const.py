@@ -5,54 +5,50 @@ from __future__ import annotations
 from datetime import timedelta
 from typing import Final
 
-from homeassistant.components.weather import (
-    ATTR_CONDITION_CLEAR_NIGHT,
-    ATTR_CONDITION_CLOUDY,
-    ATTR_CONDITION_EXCEPTIONAL,
-    ATTR_CONDITION_FOG,
-    ATTR_CONDITION_HAIL,
-    ATTR_CONDITION_LIGHTNING,
-    ATTR_CONDITION_LIGHTNING_RAINY,
-    ATTR_CONDITION_PARTLYCLOUDY,
-    ATTR_CONDITION_POURING,
-    ATTR_CONDITION_RAINY,
-    ATTR_CONDITION_SNOWY,
-    ATTR_CONDITION_SNOWY_RAINY,
-    ATTR_CONDITION_SUNNY,
-    ATTR_CONDITION_WINDY,
-)
-
 DOMAIN: Final = "wetteronline"
+SIGNAL_REFRESHED: Final = f"{DOMAIN}_refreshed_{{}}"
+SIGNAL_DERIVED: Final = f"{DOMAIN}_derived_{{}}"
 
-# TODO add support for wind forecast
-# API_METRIC: Final = "Metric"
 # ATTRIBUTION: Final = "Data provided by WetterOnline"
-# ATTR_CATEGORY: Final = "Category"
-# ATTR_DIRECTION: Final = "Direction"
-# ATTR_ENGLISH: Final = "English"
-# ATTR_LEVEL: Final = "level"
-# ATTR_SPEED: Final = "Speed"
-# ATTR_VALUE: Final = "Value"
-
 # MANUFACTURER: Final = "WetterOnline"
 # MAX_FORECAST_DAYS: Final = 4
 
-SYMBOLTEXT_CONDITION_MAP: Final[dict[str, str]] = {
-    "sonnig": ATTR_CONDITION_SUNNY,
-    "so____": ATTR_CONDITION_SUNNY,
-    "Gewitter": ATTR_CONDITION_LIGHTNING_RAINY,
-    "wb____": ATTR_CONDITION_PARTLYCLOUDY,
-    "wechselnd bewölkt": ATTR_CONDITION_PARTLYCLOUDY,
-    "wechselndbewölkt": ATTR_CONDITION_PARTLYCLOUDY,
-    "bw____": ATTR_CONDITION_PARTLYCLOUDY,
-    "bewölkt": ATTR_CONDITION_PARTLYCLOUDY,
-    "bws1__": ATTR_CONDITION_RAINY,
-    "bws2__": ATTR_CONDITION_RAINY,
-    "Schauer": ATTR_CONDITION_RAINY,
-    "mo____": ATTR_CONDITION_CLEAR_NIGHT,
-    "klar": ATTR_CONDITION_CLEAR_NIGHT,
-}
-
 UPDATE_INTERVAL_WETTERONLINE = timedelta(minutes=15)
+MIN_UPDATE_INTERVAL = timedelta(minutes=2)
+MAX_UPDATE_INTERVAL = timedelta(hours=1)
+PUBLISH_GRACE = timedelta(minutes=1)
+LATE_POLL_INTERVAL = timedelta(minutes=5)
+ERROR_BACKOFF = timedelta(minutes=1)
+MAX_BACKOFF = timedelta(hours=1)
+CHANGE_HISTORY: Final = 8
+MIN_CHANGES: Final = 3
+DEFAULT_REQUESTS_PER_HOUR: Final = 12
+DEFAULT_NOWCAST_INTERVAL: Final = 0
+NOWCAST_BUDGET_RESERVE: Final = 2
+
+MAX_CONCURRENT_FETCHES: Final = 4
+FETCH_SPACING: Final = 1.0
+PARSE_WORKERS: Final = 2
+
+RAIN_PROBABILITY: Final = 50
+PRECIPITATION_WINDOWS: Final = (3, 6, 12)
+
+HISTORY_RETENTION = timedelta(days=30)
+HISTORY_MAX_BYTES: Final = 8 * 1024 * 1024
+HISTORY_MIN_DAY_OBSERVATIONS: Final = 12
+
+SNAPSHOT_STORAGE_VERSION: Final = 2
+SNAPSHOT_MAX_AGE = timedelta(hours=6)
+SNAPSHOT_SAVE_DELAY: Final = 60
 
 CONF_URL_WETTERONLINE: Final = "url_wetteronline"
+CONF_PARSE_EXECUTOR: Final = "parse_executor"
+CONF_PARSER: Final = "parser"
+CONF_STREAMING: Final = "streaming"
+CONF_REQUESTS_PER_HOUR: Final = "requests_per_hour"
+CONF_NOWCAST_INTERVAL: Final = "nowcast_interval"
+CONF_PROXY_URL: Final = "proxy_url"
+
+PARSE_EXECUTOR_THREAD: Final = "thread"
+PARSE_EXECUTOR_PROCESS: Final = "process"
+DEFAULT_PARSE_EXECUTOR: Final = PARSE_EXECUTOR_THREAD
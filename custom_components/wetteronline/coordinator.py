@@ -1,19 +1,52 @@
 """The WetterOnline coordinator."""
 
-from asyncio import timeout
-from datetime import timedelta
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 import logging
+from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import STORAGE_DIR, Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
-from .wetteronline_api import WetterOnline, WetterOnlineData
+from .cadence import RefreshCadence, retry_after
+from .const import (
+    DOMAIN,
+    NOWCAST_BUDGET_RESERVE,
+    SIGNAL_DERIVED,
+    SIGNAL_REFRESHED,
+    SNAPSHOT_MAX_AGE,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+from .derived import DerivedMetrics, derive_metrics
+from .history import ForecastHistory, Record, history_records, observation_record
+from .wetteronline_api import (
+    SECTION_CURRENT,
+    SECTION_DAILY,
+    SECTION_HOURLY,
+    WetterOnline,
+    WetterOnlineData,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+DATA_SECTIONS = (SECTION_CURRENT, SECTION_DAILY, SECTION_HOURLY)
+
+
+@dataclass
+class ForecastCacheStats:
+    """Hits and misses of the rendered forecast cache of the entities."""
+
+    hits: int = 0
+    misses: int = 0
+
 
 class WeatherOnlineDataUpdateCoordinator(DataUpdateCoordinator[WetterOnlineData]):
     """Class to manage fetching WetterOnline data."""
@@ -21,12 +54,24 @@ class WeatherOnlineDataUpdateCoordinator(DataUpdateCoordinator[WetterOnlineData]
     def __init__(
         self,
         hass: HomeAssistant,
+        config_entry: ConfigEntry,
         wetteronline: WetterOnline,
         name: str,
         update_interval: timedelta,
+        requests_per_hour: int,
     ) -> None:
         """Initialize."""
         self.wetteronline = wetteronline
+        self.cadence = RefreshCadence(update_interval, requests_per_hour)
+        self.section_generations = dict.fromkeys(DATA_SECTIONS, 0)
+        self.changed_sections: frozenset[str] = frozenset()
+        self._fingerprints: dict[str, int] = {}
+        self.forecast_cache_stats = ForecastCacheStats()
+        self.derived: DerivedMetrics | None = None
+        self.nowcast: WetterOnlineNowcastCoordinator | None = None
+        self._snapshot_store = snapshot_store(hass, config_entry.entry_id)
+        self._snapshot_pending = False
+        self.history = forecast_history(hass, config_entry.entry_id)
 
         if TYPE_CHECKING:
             assert name is not None
@@ -42,17 +87,266 @@ class WeatherOnlineDataUpdateCoordinator(DataUpdateCoordinator[WetterOnlineData]
         super().__init__(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name=name,
             update_interval=update_interval,
+            always_update=False,
+        )
+        # The refreshes may be up to an hour apart, the metrics depending
+        # on the hour of day must not wait for the next one.
+        config_entry.async_on_unload(
+            async_track_time_change(
+                hass, self._async_update_derived, minute=0, second=0
+            )
         )
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Update data via library."""
+    async def _async_update_data(self) -> WetterOnlineData:
+        """Update data via library.
+
+        Listeners are only called when a section changed or the refresh
+        succeeded or failed unlike the previous one, `changed_sections`
+        tells which sections changed. The derived metrics depend on the
+        time of day and are computed after every successful refresh and at
+        the start of every hour, the refresh signal is sent after every
+        refresh.
+        """
+        try:
+            data = await self._async_fetch_data()
+            self.derived = derive_metrics(data.hourly_forecast, dt_util.now())
+            return data
+        finally:
+            async_dispatcher_send(
+                self.hass, SIGNAL_REFRESHED.format(self.config_entry.entry_id)
+            )
+
+    async def _async_fetch_data(self) -> WetterOnlineData:
+        """Fetch the data within the request budget.
+
+        The interval until the next update is taken from the cadence after
+        every update, requested refreshes beyond the request budget keep
+        the current data.
+        """
+        now = dt_util.utcnow()
+        if self.data is not None and self.cadence.budget_exhausted(now):
+            self.update_interval = self.cadence.next_interval(now)
+            if not self.last_update_success:
+                raise UpdateFailed("Request budget exhausted")
+            _LOGGER.debug("Request budget exhausted, keeping the current data")
+            return self.data
+
+        self.cadence.record_request(now)
         try:
-            async with timeout(10):
-                result = await self.wetteronline.async_get_weather()
+            result = await self.wetteronline.async_get_weather()
         except Exception as error:
-            _LOGGER.exception("Update failed")
+            self.update_interval = self.cadence.record_error(
+                dt_util.utcnow(), retry_after(error, dt_util.utcnow())
+            )
+            _LOGGER.exception(
+                "Update failed, phases: %s, retrying in %s",
+                self._phases_ms(),
+                self.update_interval,
+            )
             raise UpdateFailed(error) from error
 
+        changed = self._track_changes(result)
+        self.update_interval = self.cadence.record_success(
+            dt_util.utcnow(), bool(changed), self.wetteronline.last_modified
+        )
+        _LOGGER.debug(
+            "Update finished, changed: %s, phases: %s, next in %s",
+            sorted(changed),
+            self._phases_ms(),
+            self.update_interval,
+        )
+
+        if not changed:
+            # Keep the very same object, so the coordinator sees no change
+            # and everything derived from the data stays valid.
+            return self.data
+        self._snapshot_pending = True
+        self._snapshot_store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        self.async_record_history(
+            history_records(
+                result, changed, self.wetteronline.last_modified or dt_util.utcnow()
+            )
+        )
         return result
+
+    async def async_load_snapshot(self) -> bool:
+        """Set the data from the last saved snapshot.
+
+        Returns False when there is no snapshot or it is older than
+        SNAPSHOT_MAX_AGE.
+        """
+        snapshot = await self._snapshot_store.async_load()
+        if not snapshot:
+            return False
+
+        try:
+            saved_at = dt_util.parse_datetime(snapshot["saved_at"])
+            data = WetterOnlineData.from_compact(snapshot["data"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            _LOGGER.warning("Ignoring unreadable snapshot of %s", self.name)
+            return False
+        if saved_at is None or dt_util.utcnow() - saved_at > SNAPSHOT_MAX_AGE:
+            _LOGGER.debug("Snapshot of %s from %s is stale", self.name, saved_at)
+            return False
+
+        self._track_changes(data)
+        self.derived = derive_metrics(data.hourly_forecast, dt_util.now())
+        self.async_set_updated_data(data)
+        return True
+
+    @callback
+    def _async_update_derived(self, now: datetime) -> None:
+        """Recompute the derived metrics of the current forecast."""
+        if self.data is None:
+            return
+        self.derived = derive_metrics(self.data.hourly_forecast, dt_util.now())
+        async_dispatcher_send(
+            self.hass, SIGNAL_DERIVED.format(self.config_entry.entry_id)
+        )
+
+    async def async_flush_snapshot(self) -> None:
+        """Write a snapshot still waiting for its delayed save right away.
+
+        Meant for unloading: the delayed save would otherwise write the
+        snapshot after the entry is gone, also after it was removed.
+        """
+        if self._snapshot_pending:
+            await self._snapshot_store.async_save(self._snapshot())
+
+    @callback
+    def async_record_history(self, records: list[Record]) -> None:
+        """Append the records to the forecast history in the background."""
+        self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_append_history(records, dt_util.utcnow()),
+            f"{self.name} forecast history",
+        )
+
+    async def _async_append_history(self, records: list[Record], now: datetime) -> None:
+        try:
+            await self.hass.async_add_executor_job(self.history.append, records, now)
+        except OSError as error:
+            _LOGGER.warning("Cannot write the forecast history: %s", error)
+
+    def _track_changes(self, data: WetterOnlineData) -> frozenset[str]:
+        """Compare the section fingerprints and count up changed sections."""
+        fingerprints = data.fingerprints()
+        self.changed_sections = frozenset(
+            section
+            for section, fingerprint in fingerprints.items()
+            if self._fingerprints.get(section) != fingerprint
+        )
+        self._fingerprints = fingerprints
+        for section in self.changed_sections:
+            self.section_generations[section] += 1
+        return self.changed_sections
+
+    def _phases_ms(self) -> dict[str, float]:
+        timing = self.wetteronline.timings.last
+        return timing.as_dict()["phases_ms"] if timing else {}
+
+    @callback
+    def _snapshot(self) -> dict[str, Any]:
+        self._snapshot_pending = False
+        return {
+            "saved_at": dt_util.utcnow().isoformat(),
+            "data": self.data.as_compact(),
+        }
+
+
+class WetterOnlineNowcastCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Frequent refresh of only the current observations.
+
+    Full refreshes of the forecast coordinator hand over their current
+    observations when they differ, which postpones the next tick. Listeners
+    are only called when the observations changed. Nowcast requests count
+    against the request budget of the forecast coordinator but leave
+    `NOWCAST_BUDGET_RESERVE` requests per hour to it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        forecast_coordinator: WeatherOnlineDataUpdateCoordinator,
+        update_interval: timedelta,
+    ) -> None:
+        """Initialize."""
+        self.forecast_coordinator = forecast_coordinator
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name=f"{forecast_coordinator.name} nowcast",
+            update_interval=update_interval,
+            always_update=False,
+        )
+        config_entry.async_on_unload(
+            forecast_coordinator.async_add_listener(self._async_forecast_updated)
+        )
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Update the current observations."""
+        now = dt_util.utcnow()
+        cadence = self.forecast_coordinator.cadence
+        if self.data is not None and cadence.budget_exhausted(
+            now, NOWCAST_BUDGET_RESERVE
+        ):
+            _LOGGER.debug("Request budget exhausted, skipping the nowcast")
+            return self.data
+
+        cadence.record_request(now)
+        try:
+            current_observations = (
+                await self.forecast_coordinator.wetteronline.async_get_nowcast()
+            )
+        except Exception as error:
+            raise UpdateFailed(error) from error
+
+        if current_observations != self.data:
+            self.forecast_coordinator.async_record_history(
+                [observation_record(current_observations, dt_util.utcnow())]
+            )
+        return current_observations
+
+    @callback
+    def _async_forecast_updated(self) -> None:
+        forecast = self.forecast_coordinator
+        if (
+            forecast.last_update_success
+            and forecast.data is not None
+            and forecast.data.current_observations != self.data
+        ):
+            self.async_set_updated_data(forecast.data.current_observations)
+
+
+def forecast_history(hass: HomeAssistant, entry_id: str) -> ForecastHistory:
+    """Return the forecast history of the given config entry."""
+    return ForecastHistory(
+        Path(hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry_id}.history"))
+    )
+
+
+class SnapshotStore(Store[dict[str, Any]]):
+    """Store of the snapshot of one config entry."""
+
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Drop snapshots of version 1.
+
+        Their forecast rows hold the field values by position, the order of
+        which is not known any more. A snapshot is short-lived, the next
+        refresh writes a new one.
+        """
+        return {}
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> SnapshotStore:
+    """Return the store holding the snapshot of the given config entry."""
+    return SnapshotStore(
+        hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot"
+    )
@@ -0,0 +1,183 @@
+"""Metrics derived from the hourly forecast."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime
+import math
+
+import numpy as np
+
+from .const import PRECIPITATION_WINDOWS, RAIN_PROBABILITY
+from .wetteronline_api import HourlyForecast
+
+
+@dataclass(frozen=True, slots=True)
+class DailyAggregate:
+    """Aggregate of the hourly forecast of one day."""
+
+    date: date
+    hours: int
+    min_temperature: float
+    max_temperature: float
+    precipitation: float | None
+    max_precipitation_probability: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class DerivedMetrics:
+    """Metrics derived from the hourly forecast at one point in time.
+
+    `precipitation` and `max_precipitation_probability` hold the values of
+    the next hours for each of `PRECIPITATION_WINDOWS`.
+    """
+
+    computed_at: datetime
+    remaining_day_min_temperature: float | None
+    remaining_day_max_temperature: float | None
+    hours_until_rain: int | None
+    precipitation: dict[int, float | None]
+    max_precipitation_probability: dict[int, int | None]
+    daily: tuple[DailyAggregate, ...]
+
+
+class HourlySeries:
+    """The hourly forecast as NumPy columns, NaN for missing values.
+
+    The columns are built once per forecast and every metric is a
+    vectorised reduction over them, the metrics of all days and of all
+    `PRECIPITATION_WINDOWS` in one pass each.
+    """
+
+    __slots__ = (
+        "dates",
+        "day_starts",
+        "precipitation",
+        "probability",
+        "temperature",
+        "timestamps",
+    )
+
+    def __init__(self, forecast: list[HourlyForecast]) -> None:  # noqa: D107
+        self.timestamps = np.array(
+            [item.datetime.timestamp() for item in forecast], dtype=float
+        )
+        self.temperature = _column(item.temperature for item in forecast)
+        self.precipitation = _column(item.precipitation for item in forecast)
+        self.probability = _column(item.precipitation_probability for item in forecast)
+        dates = [item.datetime.date() for item in forecast]
+        ordinals = np.array([day.toordinal() for day in dates], dtype=np.int64)
+        # The index of the first hour of each day.
+        self.day_starts = np.flatnonzero(np.diff(ordinals, prepend=-1))
+        self.dates = [dates[start] for start in self.day_starts]
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.timestamps)
+
+    def index(self, moment: datetime) -> int:
+        """Return the index of the hour containing `moment`."""
+        return max(
+            int(np.searchsorted(self.timestamps, moment.timestamp(), "right")) - 1, 0
+        )
+
+    def end_of_day(self, start: int) -> int:
+        """Return the index after the last hour of the day of hour `start`."""
+        day = int(np.searchsorted(self.day_starts, start, "right"))
+        return int(self.day_starts[day]) if day < len(self.day_starts) else len(self)
+
+
+def derive_metrics(forecast: list[HourlyForecast], now: datetime) -> DerivedMetrics:
+    """Compute the derived metrics of the hourly forecast as of `now`."""
+    series = HourlySeries(forecast)
+    if not len(series):
+        return DerivedMetrics(
+            now,
+            None,
+            None,
+            None,
+            dict.fromkeys(PRECIPITATION_WINDOWS),
+            dict.fromkeys(PRECIPITATION_WINDOWS),
+            (),
+        )
+
+    start = series.index(now)
+    remaining = series.temperature[start : series.end_of_day(start)]
+
+    rainy = np.flatnonzero(series.probability[start:] >= RAIN_PROBABILITY)
+    hours_until_rain = (
+        max(
+            0,
+            math.floor((series.timestamps[start + rainy[0]] - now.timestamp()) / 3600),
+        )
+        if len(rainy)
+        else None
+    )
+
+    # Every window starts at `start`, their sums are differences of the
+    # running sums and their maxima entries of the running maximum.
+    ends = np.minimum(np.array(PRECIPITATION_WINDOWS) + start, len(series))
+    sums, counts = _running_sums(series.precipitation)
+    running_max = np.fmax.accumulate(series.probability[start:])
+    window_sums = _sums(sums[ends] - sums[start], counts[ends] - counts[start])
+    window_max = _maxima(running_max[ends - start - 1])
+
+    daily_sums = _sums(
+        np.add.reduceat(np.nan_to_num(series.precipitation), series.day_starts),
+        np.add.reduceat(~np.isnan(series.precipitation), series.day_starts),
+    )
+    return DerivedMetrics(
+        computed_at=now,
+        remaining_day_min_temperature=_value(np.nanmin(remaining)),
+        remaining_day_max_temperature=_value(np.nanmax(remaining)),
+        hours_until_rain=hours_until_rain,
+        precipitation=dict(zip(PRECIPITATION_WINDOWS, window_sums, strict=True)),
+        max_precipitation_probability=dict(
+            zip(PRECIPITATION_WINDOWS, window_max, strict=True)
+        ),
+        daily=tuple(
+            DailyAggregate(*values)
+            for values in zip(
+                series.dates,
+                np.diff(series.day_starts, append=len(series)).tolist(),
+                np.fmin.reduceat(series.temperature, series.day_starts).tolist(),
+                np.fmax.reduceat(series.temperature, series.day_starts).tolist(),
+                daily_sums,
+                _maxima(np.fmax.reduceat(series.probability, series.day_starts)),
+                strict=True,
+            )
+        ),
+    )
+
+
+def _column(values: Iterable[float | None]) -> np.ndarray:
+    """Return the values as a float array, NaN where a value is missing."""
+    return np.array(
+        [math.nan if value is None else value for value in values], dtype=float
+    )
+
+
+def _running_sums(column: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the sums and the numbers of the known values before each index."""
+    known = ~np.isnan(column)
+    return (
+        np.concatenate(([0.0], np.cumsum(np.where(known, column, 0.0)))),
+        np.concatenate(([0], np.cumsum(known))),
+    )
+
+
+def _sums(sums: np.ndarray, counts: np.ndarray) -> list[float | None]:
+    """Return the rounded sums, None where no value was known."""
+    return [
+        round(total, 1) if count else None
+        for total, count in zip(sums.tolist(), counts.tolist(), strict=True)
+    ]
+
+
+def _maxima(maxima: np.ndarray) -> list[int | None]:
+    """Return the maxima of an integer column, None where it is NaN."""
+    return [None if math.isnan(value) else int(value) for value in maxima.tolist()]
+
+
+def _value(value: np.floating) -> float | None:
+    return None if np.isnan(value) else float(value)
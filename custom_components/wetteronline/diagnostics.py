@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+from dataclasses import asdict
 from typing import Any
 
 from homeassistant.core import HomeAssistant
 
 from . import WetterOnlineConfigEntry
 from .coordinator import WeatherOnlineDataUpdateCoordinator
+from .wetteronline_api import IMPORT_SECONDS, TimingHistory
 
 
 async def async_get_config_entry_diagnostics(
@@ -15,8 +17,34 @@ async def async_get_config_entry_diagnostics(
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
     coordinator: WeatherOnlineDataUpdateCoordinator = config_entry.runtime_data
+    history = coordinator.history
 
     return {
         "config_entry_data": config_entry.data,
         "observation_data": coordinator.data,
+        "request_stats": asdict(coordinator.wetteronline.stats),
+        "forecast_cache_stats": asdict(coordinator.forecast_cache_stats),
+        "coalescing_stats": asdict(coordinator.wetteronline.single_flight.stats),
+        "cadence": {
+            **coordinator.cadence.as_dict(),
+            "update_interval_seconds": coordinator.update_interval.total_seconds(),
+        },
+        "refresh_timings": _timings(coordinator.wetteronline.timings),
+        "nowcast_timings": _timings(coordinator.wetteronline.nowcast_timings),
+        "parser_import_seconds": IMPORT_SECONDS,
+        "parser_order": coordinator.wetteronline.parser_order,
+        "forecast_history": {
+            "size_bytes": await hass.async_add_executor_job(history.size),
+            "forecast_error": await hass.async_add_executor_job(history.forecast_error),
+        },
+        "derived_metrics": (
+            asdict(coordinator.derived) if coordinator.derived else None
+        ),
+    }
+
+
+def _timings(timings: TimingHistory) -> dict[str, Any]:
+    return {
+        "percentiles_ms": timings.summary(),
+        "history": [timing.as_dict() for timing in timings],
     }
@@ -0,0 +1,312 @@
+"""Append-only history of the forecasts and observations of one location."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import datetime
+import logging
+import math
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+from typing import Any, Final
+
+from .const import HISTORY_MAX_BYTES, HISTORY_MIN_DAY_OBSERVATIONS, HISTORY_RETENTION
+from .wetteronline_api import (
+    SECTION_CURRENT,
+    SECTION_DAILY,
+    SECTION_HOURLY,
+    WetterOnlineData,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_HOURLY: Final = 0
+KIND_DAILY: Final = 1
+KIND_OBSERVED: Final = 2
+
+HEADER: Final = b"WOHIST01"
+# kind, issued at, valid at, temperature, low temperature and precipitation
+# probability, the times as epoch seconds. Missing values are NaN.
+RECORD: Final = struct.Struct("<BxxxIIfff")
+
+HOUR: Final = 3600
+DAY: Final = 24 * HOUR
+
+type Record = tuple[int, int, int, float, float, float]
+
+
+def history_records(
+    data: WetterOnlineData, sections: frozenset[str], issued_at: datetime
+) -> list[Record]:
+    """Return the records of the changed sections of a refresh.
+
+    The current observations are recorded as observed at `issued_at`.
+    """
+    issued = int(issued_at.timestamp())
+    records: list[Record] = []
+    if SECTION_CURRENT in sections:
+        records.append(observation_record(data.current_observations, issued_at))
+    if SECTION_HOURLY in sections:
+        records.extend(
+            (
+                KIND_HOURLY,
+                issued,
+                int(hour.datetime.timestamp()),
+                hour.temperature,
+                math.nan,
+                _value(hour.precipitation_probability),
+            )
+            for hour in data.hourly_forecast
+        )
+    if SECTION_DAILY in sections:
+        records.extend(
+            (
+                KIND_DAILY,
+                issued,
+                int(day.datetime.timestamp()),
+                day.max_temperature,
+                day.min_temperature,
+                _value(day.precipitation_probability),
+            )
+            for day in data.daily_forecast
+        )
+    return records
+
+
+def observation_record(
+    current_observations: dict[str, Any], observed_at: datetime
+) -> Record:
+    """Return the record of the current observations."""
+    observed = int(observed_at.timestamp())
+    return (
+        KIND_OBSERVED,
+        observed,
+        observed,
+        current_observations["temperature"],
+        math.nan,
+        math.nan,
+    )
+
+
+class ForecastHistory:
+    """Fixed-width binary file of forecast and observation records.
+
+    Records are only ever appended, in the order they were issued, and
+    read by copying them out of a memory map. Records older than
+    `HISTORY_RETENTION` are dropped once the oldest one is a day past it or
+    the file grows beyond `HISTORY_MAX_BYTES`. All methods block on file
+    IO, call them from an executor.
+    """
+
+    def __init__(self, path: Path) -> None:  # noqa: D107
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, records: list[Record], now: datetime) -> None:
+        """Append the records and drop the expired ones."""
+        if not records:
+            return
+        payload = b"".join(RECORD.pack(*record) for record in records)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Set aside a foreign file before appending, rotating would set
+            # it aside only afterwards, together with the new records.
+            _set_aside_foreign(self.path)
+            with self.path.open("ab") as file:
+                if file.tell() < len(HEADER):
+                    file.truncate(0)
+                    file.write(HEADER)
+                else:
+                    # Cut off the rest of a record torn by a crash.
+                    file.truncate(self._end(file.tell()))
+                file.write(payload)
+            self._rotate(int(now.timestamp()))
+
+    def records(self) -> Iterator[Record]:
+        """Yield all records, oldest first.
+
+        The records are copied out under the lock when iteration starts,
+        the file may change while they are being consumed.
+        """
+        with self._lock, self._mapped() as mapped:
+            if mapped is None:
+                return
+            data = mapped[len(HEADER) : self._end(len(mapped))]
+        yield from RECORD.iter_unpack(data)
+
+    def forecast_error(self) -> dict[str, dict[int, dict[str, float]]]:
+        """Return the error of the forecasts against the observations.
+
+        Hourly forecasts are compared to the last observation within their
+        hour, by lead time in hours. Daily maximum and minimum temperatures
+        are compared to the extremes observed that day, by lead time in
+        days, when at least `HISTORY_MIN_DAY_OBSERVATIONS` hours of the day
+        were observed. Only the observations are held in memory.
+        """
+        observed: dict[int, float] = {}
+        for kind, _, valid, temperature, _, _ in self.records():
+            if kind == KIND_OBSERVED:
+                observed[valid // HOUR] = temperature
+        hours = sorted(observed)
+
+        errors: dict[str, defaultdict[int, ErrorStats]] = {
+            "hourly_temperature": defaultdict(ErrorStats),
+            "daily_max_temperature": defaultdict(ErrorStats),
+            "daily_min_temperature": defaultdict(ErrorStats),
+        }
+        for kind, issued, valid, temperature, low, _ in self.records():
+            if kind == KIND_HOURLY:
+                if (actual := observed.get(valid // HOUR)) is not None:
+                    lead = max(0, (valid - issued) // HOUR)
+                    errors["hourly_temperature"][lead].add(temperature - actual)
+            elif kind == KIND_DAILY:
+                first = bisect_left(hours, valid // HOUR)
+                end = bisect_left(hours, (valid + DAY) // HOUR)
+                if end - first < HISTORY_MIN_DAY_OBSERVATIONS:
+                    continue
+                day = [observed[hour] for hour in hours[first:end]]
+                lead = max(0, (valid - issued + DAY - 1) // DAY)
+                errors["daily_max_temperature"][lead].add(temperature - max(day))
+                errors["daily_min_temperature"][lead].add(low - min(day))
+
+        return {
+            name: {lead: stats.as_dict() for lead, stats in sorted(by_lead.items())}
+            for name, by_lead in errors.items()
+        }
+
+    def size(self) -> int:
+        """Return the size of the file in bytes."""
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def remove(self) -> None:
+        """Remove the file."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+
+    def _rotate(self, now: int) -> None:
+        cutoff = now - int(HISTORY_RETENTION.total_seconds())
+        with self._mapped() as mapped:
+            if mapped is None:
+                return
+            count = (self._end(len(mapped)) - len(HEADER)) // RECORD.size
+            oldest = self._issued(mapped, 0) if count else now
+            if oldest >= cutoff - DAY and len(mapped) <= HISTORY_MAX_BYTES:
+                return
+            # Records are appended in issue order, the first one to keep is
+            # found by bisection.
+            first = bisect_left(
+                range(count), cutoff, key=lambda index: self._issued(mapped, index)
+            )
+            first = max(first, count - HISTORY_MAX_BYTES // 2 // RECORD.size)
+            start = len(HEADER) + first * RECORD.size
+            kept = mapped[start : self._end(len(mapped))]
+
+        _LOGGER.debug("Dropping %s records from %s", first, self.path)
+        temporary = self.path.with_suffix(".tmp")
+        with temporary.open("wb") as file:
+            file.write(HEADER)
+            file.write(kept)
+        os.replace(temporary, self.path)
+
+    def _mapped(self) -> _MappedFile:
+        return _MappedFile(self.path)
+
+    @staticmethod
+    def _end(size: int) -> int:
+        """Return the end of the last complete record of a file of `size`."""
+        return size - (size - len(HEADER)) % RECORD.size
+
+    @staticmethod
+    def _issued(mapped: mmap.mmap, index: int) -> int:
+        return RECORD.unpack_from(mapped, len(HEADER) + index * RECORD.size)[1]
+
+
+class _MappedFile:
+    """Read-only memory map of a history file, None if it holds no records.
+
+    A file with a foreign header is set aside so a fresh one is started.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._mapped: mmap.mmap | None = None
+
+    def __enter__(self) -> mmap.mmap | None:
+        try:
+            if _set_aside_foreign(self._path):
+                return None
+            with self._path.open("rb") as file:
+                if file.read(len(HEADER)) != HEADER:
+                    return None
+                if os.fstat(file.fileno()).st_size < len(HEADER) + RECORD.size:
+                    return None
+                self._mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        return self._mapped
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._mapped is not None:
+            self._mapped.close()
+
+
+def _set_aside_foreign(path: Path) -> bool:
+    """Rename a file with a foreign header to .bad, return True if it had one.
+
+    A file cut off within the header, by a crash while starting it, is not
+    foreign, appending starts it again.
+    """
+    try:
+        with path.open("rb") as file:
+            header = file.read(len(HEADER))
+    except FileNotFoundError:
+        return False
+    if HEADER.startswith(header):
+        return False
+    _LOGGER.warning("Setting aside unknown file %s", path)
+    os.replace(path, path.with_suffix(".bad"))
+    return True
+
+
+class ErrorStats:
+    """Running error statistics of one lead time."""
+
+    __slots__ = ("absolute", "count", "squared", "total")
+
+    def __init__(self) -> None:  # noqa: D107
+        self.count = 0
+        self.total = 0.0
+        self.absolute = 0.0
+        self.squared = 0.0
+
+    def add(self, error: float) -> None:
+        """Add the error of one forecast, NaN errors are skipped."""
+        if math.isnan(error):
+            return
+        self.count += 1
+        self.total += error
+        self.absolute += abs(error)
+        self.squared += error * error
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the count, mean error, mean absolute error and RMSE."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "bias": round(self.total / self.count, 2),
+            "mae": round(self.absolute / self.count, 2),
+            "rmse": round(math.sqrt(self.squared / self.count), 2),
+        }
+
+
+def _value(value: float | None) -> float:
+    return math.nan if value is None else value
@@ -0,0 +1,118 @@
+"""Fetch scheduler shared by all WetterOnline locations."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import logging
+from multiprocessing import get_context
+
+from aiohttp import ClientSession
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import (
+    DOMAIN,
+    FETCH_SPACING,
+    MAX_CONCURRENT_FETCHES,
+    PARSE_EXECUTOR_PROCESS,
+    PARSE_WORKERS,
+)
+from .wetteronline_api import SingleFlight, trace_config
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FetchScheduler:
+    """Owner of the resources shared by the WetterOnline locations.
+
+    Holds the ClientSession, bounds the number of concurrent downloads,
+    spaces the start of downloads so the coordinators of many locations
+    do not hit the network in the same second, coalesces concurrent
+    refreshes of the same url and owns the parse worker pool as well as
+    the single worker feeding the streamed pages into lxml.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        max_concurrent_fetches: int = MAX_CONCURRENT_FETCHES,
+        fetch_spacing: float = FETCH_SPACING,
+    ) -> None:
+        """Initialize."""
+        self.session = session
+        self.entry_ids: set[str] = set()
+        self.single_flight = SingleFlight()
+        self._semaphore = asyncio.Semaphore(max_concurrent_fetches)
+        self._fetch_spacing = fetch_spacing
+        self._next_start = 0.0
+        self._process_pool: ProcessPoolExecutor | None = None
+        # The thread is only started by the first streamed page.
+        self.collect_executor = ThreadPoolExecutor(
+            1, thread_name_prefix="wetteronline_collect"
+        )
+
+    @asynccontextmanager
+    async def async_fetch_slot(self) -> AsyncIterator[None]:
+        """Wait for a download slot and hold it while downloading."""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next_start)
+            # Reserve the start time before sleeping, so every waiter gets
+            # its own slot instead of all waking up at the same moment.
+            self._next_start = start + self._fetch_spacing
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+    def executor(self, parse_executor: str) -> Executor | None:
+        """Return the executor for the given parse executor option.
+
+        None stands for the default thread pool of the event loop.
+        """
+        if parse_executor != PARSE_EXECUTOR_PROCESS:
+            return None
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS, mp_context=get_context("spawn")
+            )
+        return self._process_pool
+
+    def shutdown(self) -> None:
+        """Release the session and the worker pools."""
+        self.session.detach()
+        self.collect_executor.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+
+@callback
+def async_acquire_scheduler(hass: HomeAssistant, entry: ConfigEntry) -> FetchScheduler:
+    """Return the shared scheduler, released again when the entry unloads."""
+    scheduler: FetchScheduler | None = hass.data.get(DOMAIN)
+    if scheduler is None:
+        # An own session, traced to time the network phases of a refresh.
+        # It lives as long as the scheduler, not the entry creating it.
+        session = async_create_clientsession(
+            hass, auto_cleanup=False, trace_configs=[trace_config()]
+        )
+        scheduler = hass.data[DOMAIN] = FetchScheduler(session)
+
+    scheduler.entry_ids.add(entry.entry_id)
+
+    @callback
+    def _async_release() -> None:
+        scheduler.entry_ids.discard(entry.entry_id)
+        if not scheduler.entry_ids:
+            _LOGGER.debug("Last location unloaded, shutting down the scheduler")
+            scheduler.shutdown()
+            hass.data.pop(DOMAIN, None)
+
+    entry.async_on_unload(_async_release)
+    return scheduler
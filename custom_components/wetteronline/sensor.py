@@ -0,0 +1,272 @@
+"""Sensors of the WetterOnline refreshes and of the derived metrics."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    CONF_NAME,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfPrecipitationDepth,
+    UnitOfTemperature,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import WetterOnlineConfigEntry
+from .const import PRECIPITATION_WINDOWS, SIGNAL_DERIVED, SIGNAL_REFRESHED
+from .coordinator import WeatherOnlineDataUpdateCoordinator
+from .derived import DerivedMetrics
+from .wetteronline_api import TimingHistory
+
+PARALLEL_UPDATES = 0
+
+
+@dataclass(frozen=True, kw_only=True)
+class WetterOnlineSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor of the refresh timings."""
+
+    value_fn: Callable[[TimingHistory], float | None]
+
+
+def _duration(
+    key: str, value_fn: Callable[[TimingHistory], float | None]
+) -> WetterOnlineSensorEntityDescription:
+    return WetterOnlineSensorEntityDescription(
+        key=key,
+        translation_key=key,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=0,
+        value_fn=value_fn,
+    )
+
+
+def _last(attribute: str) -> Callable[[TimingHistory], float | None]:
+    def value(timings: TimingHistory) -> float | None:
+        return getattr(timings.last, attribute) if timings.last else None
+
+    return value
+
+
+SENSOR_TYPES: tuple[WetterOnlineSensorEntityDescription, ...] = (
+    _duration("refresh_duration", lambda timings: timings.latest("total")),
+    _duration("refresh_duration_p90", lambda timings: timings.percentile("total", 90)),
+    _duration("ttfb", lambda timings: timings.latest("ttfb")),
+    _duration("download_duration", lambda timings: timings.latest("body")),
+    _duration("parse_duration", lambda timings: timings.latest("parse")),
+    _duration("parse_duration_p90", lambda timings: timings.percentile("parse", 90)),
+    WetterOnlineSensorEntityDescription(
+        key="response_size",
+        translation_key="response_size",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        value_fn=_last("response_bytes"),
+    ),
+    WetterOnlineSensorEntityDescription(
+        key="hourly_records",
+        translation_key="hourly_records",
+        value_fn=_last("hourly_records"),
+    ),
+    WetterOnlineSensorEntityDescription(
+        key="daily_records",
+        translation_key="daily_records",
+        value_fn=_last("daily_records"),
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class WetterOnlineDerivedSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor of the metrics derived from the hourly forecast."""
+
+    value_fn: Callable[[DerivedMetrics], float | None]
+    attributes_fn: Callable[[DerivedMetrics], dict[str, Any]] | None = None
+
+
+def _temperature(
+    key: str, value_fn: Callable[[DerivedMetrics], float | None]
+) -> WetterOnlineDerivedSensorEntityDescription:
+    return WetterOnlineDerivedSensorEntityDescription(
+        key=key,
+        translation_key=key,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        value_fn=value_fn,
+    )
+
+
+def _precipitation(hours: int) -> WetterOnlineDerivedSensorEntityDescription:
+    return WetterOnlineDerivedSensorEntityDescription(
+        key=f"precipitation_next_{hours}h",
+        translation_key=f"precipitation_next_{hours}h",
+        device_class=SensorDeviceClass.PRECIPITATION,
+        native_unit_of_measurement=UnitOfPrecipitationDepth.MILLIMETERS,
+        value_fn=lambda derived: derived.precipitation[hours],
+        attributes_fn=lambda derived: {
+            "max_precipitation_probability": (
+                derived.max_precipitation_probability[hours]
+            )
+        },
+    )
+
+
+def _today_precipitation(derived: DerivedMetrics) -> float | None:
+    return derived.daily[0].precipitation if derived.daily else None
+
+
+DERIVED_SENSOR_TYPES: tuple[WetterOnlineDerivedSensorEntityDescription, ...] = (
+    _temperature(
+        "remaining_day_min_temperature",
+        lambda derived: derived.remaining_day_min_temperature,
+    ),
+    _temperature(
+        "remaining_day_max_temperature",
+        lambda derived: derived.remaining_day_max_temperature,
+    ),
+    WetterOnlineDerivedSensorEntityDescription(
+        key="hours_until_rain",
+        translation_key="hours_until_rain",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        value_fn=lambda derived: derived.hours_until_rain,
+    ),
+    *(_precipitation(hours) for hours in PRECIPITATION_WINDOWS),
+    WetterOnlineDerivedSensorEntityDescription(
+        key="today_precipitation",
+        translation_key="today_precipitation",
+        device_class=SensorDeviceClass.PRECIPITATION,
+        native_unit_of_measurement=UnitOfPrecipitationDepth.MILLIMETERS,
+        value_fn=_today_precipitation,
+        attributes_fn=lambda derived: {"days": [asdict(day) for day in derived.daily]},
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: WetterOnlineConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Add the WetterOnline sensors from a config_entry."""
+    name = entry.data[CONF_NAME]
+    async_add_entities(
+        [
+            *(
+                WetterOnlineSensor(entry.runtime_data, name, description)
+                for description in SENSOR_TYPES
+            ),
+            *(
+                WetterOnlineDerivedSensor(entry.runtime_data, name, description)
+                for description in DERIVED_SENSOR_TYPES
+            ),
+        ]
+    )
+
+
+class WetterOnlineSensor(
+    CoordinatorEntity[WeatherOnlineDataUpdateCoordinator], SensorEntity
+):
+    """Sensor of the recent refresh timings, disabled by default.
+
+    The coordinator only calls its listeners when the data changed, the
+    sensors follow the refresh signal sent after every refresh instead.
+    """
+
+    entity_description: WetterOnlineSensorEntityDescription
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: WeatherOnlineDataUpdateCoordinator,
+        name: str,
+        description: WetterOnlineSensorEntityDescription,
+    ) -> None:
+        """Initialize."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{name}_{description.key}"
+        self._attr_device_info = coordinator.device_info
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the refresh signal of the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_REFRESHED.format(self.coordinator.config_entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Leave the state to the refresh signal, which also covers this."""
+
+    @property
+    def available(self) -> bool:
+        """Return True, the timings of failed refreshes are of interest too."""
+        return True
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.wetteronline.timings)
+
+
+class WetterOnlineDerivedSensor(WetterOnlineSensor):
+    """Sensor of a metric derived from the hourly forecast.
+
+    The metrics are recomputed after every successful refresh and at the
+    start of every hour, as they depend on the time of day even when the
+    forecast did not change.
+    """
+
+    entity_description: WetterOnlineDerivedSensorEntityDescription
+
+    _attr_entity_category = None
+    _attr_entity_registry_enabled_default = True
+
+    async def async_added_to_hass(self) -> None:
+        """Also follow the hourly recomputation of the metrics."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_DERIVED.format(self.coordinator.config_entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True if there are derived metrics."""
+        return self.coordinator.derived is not None
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.derived)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the details of the metric."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator.derived)
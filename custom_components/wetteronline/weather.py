@@ -2,25 +2,22 @@
 
 from __future__ import annotations
 
-from datetime import UTC
-from typing import cast
+from collections.abc import Callable
+from functools import partial
+from typing import Any, Literal, cast
 
 from homeassistant.components.weather import (
-    ATTR_FORECAST_CLOUD_COVERAGE,
     ATTR_FORECAST_CONDITION,
     ATTR_FORECAST_HUMIDITY,
     ATTR_FORECAST_NATIVE_APPARENT_TEMP,
-    ATTR_FORECAST_NATIVE_PRECIPITATION,
     ATTR_FORECAST_NATIVE_TEMP,
     ATTR_FORECAST_NATIVE_TEMP_LOW,
-    ATTR_FORECAST_NATIVE_WIND_GUST_SPEED,
     ATTR_FORECAST_NATIVE_WIND_SPEED,
     ATTR_FORECAST_PRECIPITATION_PROBABILITY,
     ATTR_FORECAST_TIME,
-    ATTR_FORECAST_UV_INDEX,
     ATTR_FORECAST_WIND_BEARING,
+    CoordinatorWeatherEntity,
     Forecast,
-    SingleCoordinatorWeatherEntity,
     WeatherEntityFeature,
 )
 from homeassistant.const import (
@@ -35,8 +32,17 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import WetterOnlineConfigEntry
-from .const import SYMBOLTEXT_CONDITION_MAP
-from .coordinator import WeatherOnlineDataUpdateCoordinator
+from .coordinator import (
+    WeatherOnlineDataUpdateCoordinator,
+    WetterOnlineNowcastCoordinator,
+)
+from .wetteronline_api import (
+    SECTION_CURRENT,
+    SECTION_DAILY,
+    SECTION_HOURLY,
+    symbol_condition,
+    utc_isoformat,
+)
 
 PARALLEL_UPDATES = 1
 
@@ -51,9 +57,17 @@ async def async_setup_entry(
 
 
 class WetterOnlineEntity(
-    SingleCoordinatorWeatherEntity[WeatherOnlineDataUpdateCoordinator]
+    CoordinatorWeatherEntity[
+        WeatherOnlineDataUpdateCoordinator | WetterOnlineNowcastCoordinator
+    ]
 ):
-    """Define an WetterOnline entity."""
+    """Define an WetterOnline entity.
+
+    The state follows the nowcast coordinator in tiered mode and the
+    forecast coordinator otherwise, it is only written when the current
+    observations or the availability changed. Forecast subscribers are
+    only notified when the section of their forecast type changed.
+    """
 
     _attr_has_entity_name = True
     _attr_name = None
@@ -62,7 +76,7 @@ class WetterOnlineEntity(
         self, coordinator: WeatherOnlineDataUpdateCoordinator, name: str
     ) -> None:
         """Initialize."""
-        super().__init__(coordinator)
+        super().__init__(coordinator.nowcast or coordinator)
 
         self._attr_native_precipitation_unit = UnitOfPrecipitationDepth.MILLIMETERS
         self._attr_native_pressure_unit = UnitOfPressure.HPA
@@ -74,75 +88,128 @@ class WetterOnlineEntity(
         self._attr_supported_features = (
             WeatherEntityFeature.FORECAST_DAILY | WeatherEntityFeature.FORECAST_HOURLY
         )
-        self.coordinator: WeatherOnlineDataUpdateCoordinator = coordinator
+        self.forecast_coordinator = coordinator
+        self._forecast_cache: dict[str, tuple[int, list[Forecast]]] = {}
+        self._notified_generation: dict[str, int] = {}
+        self._written_available: bool | None = None
+
+    @property
+    def _current_observations(self) -> dict[str, Any]:
+        if nowcast := self.forecast_coordinator.nowcast:
+            return nowcast.data
+        return self.forecast_coordinator.data.current_observations
 
     @property
     def condition(self) -> str | None:
         """Return the current condition."""
-        return _map_symbol_to_condition(
-            self.coordinator.data.current_observations["symbol"]
-        )
+        return symbol_condition(self._current_observations["symbol"])
 
     @property
     def native_temperature(self) -> float:
         """Return the temperature."""
-        return cast(float, self.coordinator.data.current_observations["temperature"])
+        return cast(float, self._current_observations["temperature"])
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state when the current observations changed."""
+        if (
+            self.coordinator is self.forecast_coordinator
+            and self.available == self._written_available
+            and SECTION_CURRENT not in self.forecast_coordinator.changed_sections
+        ):
+            return
+        self._written_available = self.available
+        super()._handle_coordinator_update()
+
+    @callback
+    def _async_subscription_started(
+        self, forecast_type: Literal["daily", "hourly", "twice_daily"]
+    ) -> None:
+        """Notify the subscribers of forecast_type about new forecasts.
+
+        The daily and hourly forecast types are named like their sections.
+        """
+        self._notified_generation[forecast_type] = (
+            self.forecast_coordinator.section_generations[forecast_type]
+        )
+        self.unsub_forecast[forecast_type] = (
+            self.forecast_coordinator.async_add_listener(
+                partial(self._async_notify_forecast, forecast_type)
+            )
+        )
+
+    @callback
+    def _async_notify_forecast(
+        self, forecast_type: Literal["daily", "hourly", "twice_daily"]
+    ) -> None:
+        generation = self.forecast_coordinator.section_generations[forecast_type]
+        if self._notified_generation.get(forecast_type) == generation:
+            return
+        self._notified_generation[forecast_type] = generation
+        self.forecast_coordinator.config_entry.async_create_task(
+            self.hass, self.async_update_listeners((forecast_type,))
+        )
 
     @callback
     def _async_forecast_daily(self) -> list[Forecast] | None:
         """Return the daily forecast in native units."""
-        return [
-            {
-                ATTR_FORECAST_TIME: item["datetime"].astimezone(UTC).isoformat(),
-                ATTR_FORECAST_NATIVE_TEMP: item["maxTemperature"],
-                ATTR_FORECAST_NATIVE_TEMP_LOW: item["minTemperature"],
-                ATTR_FORECAST_PRECIPITATION_PROBABILITY: item[
-                    "precipitationProbability"
-                ],
-                # ATTR_FORECAST_CONDITION: _map_symbol_to_condition(item["symbolText"]),
-                # ATTR_FORECAST_CLOUD_COVERAGE: item["CloudCoverDay"],
-                # ATTR_FORECAST_HUMIDITY: item["RelativeHumidityDay"]["Average"],
-                # ATTR_FORECAST_NATIVE_APPARENT_TEMP: item["RealFeelTemperatureMax"][
-                #     ATTR_VALUE
-                # ],
-                # ATTR_FORECAST_NATIVE_PRECIPITATION: item["TotalLiquidDay"][ATTR_VALUE],
-                # ATTR_FORECAST_NATIVE_WIND_SPEED: item["WindDay"][ATTR_SPEED][
-                #     ATTR_VALUE
-                # ],
-                # ATTR_FORECAST_NATIVE_WIND_GUST_SPEED: item["WindGustDay"][ATTR_SPEED][
-                #     ATTR_VALUE
-                # ],
-                # ATTR_FORECAST_UV_INDEX: item["UVIndex"][ATTR_VALUE],
-                # ATTR_FORECAST_WIND_BEARING: item["WindDay"][ATTR_DIRECTION]["Degrees"],
-            }
-            for item in self.coordinator.data.daily_forecast
-        ]
+        return self._cached_forecast(SECTION_DAILY, self._render_forecast_daily)
 
     @callback
     def _async_forecast_hourly(self) -> list[Forecast] | None:
         """Return the hourly forecast in native units."""
+        return self._cached_forecast(SECTION_HOURLY, self._render_forecast_hourly)
+
+    def _cached_forecast(
+        self, forecast_type: str, render: Callable[[], list[Forecast]]
+    ) -> list[Forecast]:
+        """Return the forecast rendered for the current section generation.
+
+        Every forecast subscriber and websocket client asks for the
+        forecast after each update, the list is only rendered for the first
+        of them.
+        """
+        generation = self.forecast_coordinator.section_generations[forecast_type]
+        stats = self.forecast_coordinator.forecast_cache_stats
+        cached = self._forecast_cache.get(forecast_type)
+        if cached is not None and cached[0] == generation:
+            stats.hits += 1
+            return cached[1]
+
+        stats.misses += 1
+        forecast = render()
+        self._forecast_cache[forecast_type] = (generation, forecast)
+        return forecast
+
+    # The precipitation amount, wind, cloud cover and UV index rows and keys
+    # are parsed, but not published until they are checked against a page
+    # recorded from WetterOnline, see benchmarks.record.
+
+    def _render_forecast_daily(self) -> list[Forecast]:
         return [
             {
-                ATTR_FORECAST_TIME: item["datetime"].astimezone(UTC).isoformat(),
-                ATTR_FORECAST_CONDITION: _map_symbol_to_condition(item["symbolText"]),
-                ATTR_FORECAST_NATIVE_TEMP: item["temperature"],
-                ATTR_FORECAST_NATIVE_APPARENT_TEMP: item["apparentTemperature"],
-                ATTR_FORECAST_HUMIDITY: item["humidity"],
-                # ATTR_FORECAST_CLOUD_COVERAGE: item["CloudCover"],
-                # ATTR_FORECAST_NATIVE_PRECIPITATION: item["TotalLiquid"][ATTR_VALUE],
-                # ATTR_FORECAST_PRECIPITATION_PROBABILITY: item[
-                #     "PrecipitationProbability"
-                # ],
-                # ATTR_FORECAST_NATIVE_WIND_SPEED: item["Wind"][ATTR_SPEED][ATTR_VALUE],
-                # ATTR_FORECAST_NATIVE_WIND_GUST_SPEED: item["WindGust"][ATTR_SPEED][
-                #     ATTR_VALUE
-                # ],
-                # ATTR_FORECAST_UV_INDEX: item["UVIndex"],
-                # ATTR_FORECAST_WIND_BEARING: item["Wind"][ATTR_DIRECTION]["Degrees"],
+                ATTR_FORECAST_TIME: utc_isoformat(item.datetime),
+                ATTR_FORECAST_NATIVE_TEMP: item.max_temperature,
+                ATTR_FORECAST_NATIVE_TEMP_LOW: item.min_temperature,
+                ATTR_FORECAST_PRECIPITATION_PROBABILITY: item.precipitation_probability,
             }
-            for item in self.coordinator.data.hourly_forecast
+            for item in self.forecast_coordinator.data.daily_forecast
         ]
 
-
-def _map_symbol_to_condition(symbol: str) -> str:
-    return SYMBOLTEXT_CONDITION_MAP.get(symbol, symbol)
+    def _render_forecast_hourly(self) -> list[Forecast]:
+        return [
+            {
+                ATTR_FORECAST_TIME: utc_isoformat(item.datetime),
+                # Records restored from before conditions were parsed have none.
+                ATTR_FORECAST_CONDITION: (
+                    item.condition or symbol_condition(item.symbol_text)
+                ),
+                ATTR_FORECAST_NATIVE_TEMP: item.temperature,
+                ATTR_FORECAST_NATIVE_APPARENT_TEMP: item.apparent_temperature,
+                ATTR_FORECAST_HUMIDITY: item.humidity,
+                ATTR_FORECAST_PRECIPITATION_PROBABILITY: item.precipitation_probability,
+                ATTR_FORECAST_NATIVE_WIND_SPEED: item.wind_speed,
+                ATTR_FORECAST_WIND_BEARING: item.wind_bearing,
+            }
+            for item in self.forecast_coordinator.data.hourly_forecast
+        ]
@@ -1,20 +1,143 @@
-"""API for fetching WetterOnline data."""
+"""API for fetching WetterOnline data.
 
-import ast
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+The parser dependencies bs4 and lxml are only imported on the first parse,
+see `import_parser_module`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from asyncio import timeout
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import (
+    AbstractAsyncContextManager,
+    contextmanager,
+    nullcontext,
+    suppress,
+)
+from dataclasses import dataclass, field, fields
+from datetime import UTC, date, datetime, timedelta, tzinfo
+from email.utils import parsedate_to_datetime
+from functools import cache, lru_cache, partial
+import hashlib
 import html
-from typing import Any, Final
+from http import HTTPStatus
+import importlib
+import json
+import logging
+import math
+import re
+import sys
+import time
+from types import ModuleType, SimpleNamespace
+from typing import TYPE_CHECKING, Any, Final
 from zoneinfo import ZoneInfo
 
-from aiohttp import ClientSession
-import bs4
+from aiohttp import ClientResponse, ClientSession, TraceConfig, hdrs
+
+if TYPE_CHECKING:
+    from lxml import etree
+
+_LOGGER = logging.getLogger(__name__)
 
 MIDNIGHT: Final = datetime.min.time()
+BASE_URL: Final = "https://www.wetteronline.de"
 HTTP_HEADERS: dict[str, str] = {
     "Accept-Encoding": "gzip",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36",
 }
+NETWORK_TIMEOUT: Final = 10
+PARSE_TIMEOUT: Final = 20
+STREAM_CHUNK_SIZE: Final = 16 * 1024
+PROXY_WEATHER_PATH: Final = "/v1/weather"
+TIMING_HISTORY_SIZE: Final = 96
+TIMING_PERCENTILES: Final = (50, 90, 99)
+COALESCE_TTL: Final = 5.0
+
+SECTION_CURRENT: Final = "current"
+SECTION_DAILY: Final = "daily"
+SECTION_HOURLY: Final = "hourly"
+
+PARSER_BS4: Final = "bs4"
+PARSER_LXML: Final = "lxml"
+PARSER_REGEX: Final = "regex"
+PARSER_AUTO: Final = "auto"
+# The backend the others have to agree with in `rank_parsers`.
+REFERENCE_PARSER: Final = PARSER_BS4
+# The backend `rank_parsers` compares the others with, the slow reference
+# only runs when it fails.
+RANK_REFERENCE: Final = PARSER_LXML
+# The regex backend is only checked against synthetic pages so far, AUTO
+# would pick it as the fastest.
+DEFAULT_PARSER: Final = PARSER_LXML
+# Pages parsed with `PARSER_AUTO` before the backends are ranked again.
+RANK_INTERVAL: Final = 96
+
+
+@dataclass(frozen=True, slots=True)
+class HourlyForecast:
+    """Forecast for one hour."""
+
+    datetime: datetime
+    temperature: int
+    apparent_temperature: int | None
+    humidity: int | None
+    symbol_text: str
+    precipitation_probability: int | None = None
+    precipitation: float | None = None
+    wind_speed: int | None = None
+    wind_bearing: str | None = None
+    cloud_coverage: int | None = None
+    uv_index: int | None = None
+    condition: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class DailyForecast:
+    """Forecast for one day."""
+
+    datetime: datetime
+    max_temperature: int
+    min_temperature: int
+    sun_hours: int
+    precipitation_probability: int
+    precipitation: float | None = None
+    wind_speed: int | None = None
+    wind_gust_speed: int | None = None
+    cloud_coverage: int | None = None
+    uv_index: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class FieldSpec:
+    """Where one forecast field is read from.
+
+    `key` is the key of the hourly forecast script or the id or class of
+    the row of the `weather` table holding the daily values. Optional
+    fields are None when the page does not carry them.
+    """
+
+    field: str
+    key: str
+    convert: Callable[[Any], Any] | None = None
+    required: bool = False
+
+
+CELL_VALUE: Final = "value"
+CELL_TEXT: Final = "text"
+
+
+@dataclass(frozen=True, slots=True)
+class RowSpec(FieldSpec):
+    """Where one daily forecast field is read from.
+
+    The value of a `CELL_VALUE` cell is the second span of each div of the
+    row, the one of a `CELL_TEXT` cell the text of each span.
+    """
+
+    cell: str = CELL_TEXT
 
 
 @dataclass
@@ -22,53 +145,1179 @@ class WetterOnlineData:
     """Data from WetterOnline."""
 
     current_observations: dict[str, Any]
-    daily_forecast: list[dict[str, Any]]
-    hourly_forecast: list[dict[str, Any]]
+    daily_forecast: list[DailyForecast]
+    hourly_forecast: list[HourlyForecast]
+
+    def as_compact(self) -> dict[str, Any]:
+        """Return a compact JSON serializable form of the data.
+
+        Forecast records are stored as rows keyed by field name, with the
+        datetime as ISO 8601 string. Keys of fields a reader does not know
+        are ignored and fields missing from a row take their default, so
+        rows survive fields being added, removed or reordered.
+        """
+        return {
+            SECTION_CURRENT: self.current_observations,
+            SECTION_DAILY: [_to_row(day) for day in self.daily_forecast],
+            SECTION_HOURLY: [_to_row(hour) for hour in self.hourly_forecast],
+        }
+
+    @classmethod
+    def from_compact(cls, compact: dict[str, Any]) -> WetterOnlineData:
+        """Restore the data from the form returned by `as_compact`."""
+        return cls(
+            current_observations=compact[SECTION_CURRENT],
+            daily_forecast=[
+                _from_row(DailyForecast, row) for row in compact[SECTION_DAILY]
+            ],
+            hourly_forecast=[
+                _from_row(HourlyForecast, row) for row in compact[SECTION_HOURLY]
+            ],
+        )
+
+    def fingerprints(self) -> dict[str, int]:
+        """Return a fingerprint per section, equal for equal sections.
+
+        The fingerprints are hashes of the frozen records, cheap enough to
+        compute on every refresh. String hashes are salted per process,
+        fingerprints must not be stored or compared across processes.
+        """
+        return {
+            SECTION_CURRENT: hash(frozenset(self.current_observations.items())),
+            SECTION_DAILY: hash(tuple(self.daily_forecast)),
+            SECTION_HOURLY: hash(tuple(self.hourly_forecast)),
+        }
+
+
+def _to_row(record: HourlyForecast | DailyForecast) -> dict[str, Any]:
+    row = {field.name: getattr(record, field.name) for field in fields(record)}
+    row["datetime"] = row["datetime"].isoformat()
+    return row
+
+
+def _from_row[T: (HourlyForecast, DailyForecast)](
+    cls: type[T], row: dict[str, Any]
+) -> T:
+    values = {field.name: row[field.name] for field in fields(cls) if field.name in row}
+    values["datetime"] = datetime.fromisoformat(row["datetime"])
+    return cls(**values)
+
+
+AXIS_DAYS: Final = 8
+# Time zone and first day pairs kept, a few locations over a day change.
+TIME_AXES: Final = 16
+
+
+@dataclass(frozen=True, slots=True)
+class TimeAxis:
+    """The midnights and hours of consecutive days in one time zone.
+
+    Axes are built once per time zone and first day by `time_axis`, the
+    forecasts of every parse on that day share their datetimes.
+    """
+
+    timezone: tzinfo | None
+    first_day: date
+    midnights: tuple[datetime, ...]
+    hours: tuple[tuple[datetime, ...], ...]
+
+    def midnight(self, offset: int) -> datetime:
+        """Return the start of the day `offset` days after the first day."""
+        if offset < len(self.midnights):
+            return self.midnights[offset]
+        return datetime.combine(
+            self.first_day + timedelta(days=offset), MIDNIGHT, self.timezone
+        )
+
+
+@lru_cache(maxsize=TIME_AXES)
+def time_axis(timezone: tzinfo | None, first_day: date) -> TimeAxis:
+    """Return the time axis of `AXIS_DAYS` days from `first_day` on.
+
+    The ISO strings of all its hours are put into the cache of
+    `utc_isoformat` right away.
+    """
+    midnights = tuple(
+        datetime.combine(first_day + timedelta(days=offset), MIDNIGHT, timezone)
+        for offset in range(AXIS_DAYS)
+    )
+    hours = tuple(
+        tuple(midnight.replace(hour=hour) for hour in range(24))
+        for midnight in midnights
+    )
+    for day in hours:
+        for hour in day:
+            utc_isoformat(hour)
+    return TimeAxis(timezone, first_day, midnights, hours)
+
+
+@lru_cache(maxsize=TIME_AXES * AXIS_DAYS * 24)
+def utc_isoformat(moment: datetime) -> str:
+    """Return `moment` in UTC as ISO 8601 string, cached per moment.
+
+    Sized for every hour of every cached axis, the warming of a new axis
+    must not evict the strings of the others.
+    """
+    return moment.astimezone(UTC).isoformat()
+
+
+# Conditions as named by Home Assistant, the values of the ATTR_CONDITION_*
+# constants of homeassistant.components.weather. They are part of the state
+# of weather entities and do not change, the literals keep this module free
+# of Home Assistant for the proxy, see `proxy`.
+SYMBOL_CONDITIONS: Final[dict[str, str]] = {
+    "sonnig": "sunny",
+    "so____": "sunny",
+    "Gewitter": "lightning-rainy",
+    "wb____": "partlycloudy",
+    "wechselnd bewölkt": "partlycloudy",
+    "wechselndbewölkt": "partlycloudy",
+    "bw____": "partlycloudy",
+    "bewölkt": "partlycloudy",
+    "bws1__": "rainy",
+    "bws2__": "rainy",
+    "Schauer": "rainy",
+    "mo____": "clear-night",
+    "klar": "clear-night",
+}
+
+
+def symbol_condition(symbol: str) -> str:
+    """Return the condition of a symbol code or text, the symbol if unknown."""
+    return SYMBOL_CONDITIONS.get(symbol, symbol)
+
+
+def parse_weather(raw_html: str, parser: str = REFERENCE_PARSER) -> WetterOnlineData:
+    """Extract WetterOnlineData from the raw page html."""
+    return timed_parse_weather(raw_html, parser)[0]
+
+
+def timed_parse_weather(
+    raw_html: str, parser: str = REFERENCE_PARSER
+) -> tuple[WetterOnlineData, dict[str, float]]:
+    """Extract WetterOnlineData and the seconds spent per parse phase.
+
+    This is the CPU-bound stage of a refresh. It is a module level function
+    working only on its arguments, so it can be handed to a thread or a
+    process pool and its result can be dropped if the caller goes away.
+    """
+    timing = RefreshTiming()
+    return _extract(PARSERS[parser](raw_html, timing=timing)), timing.phases
+
+
+def auto_parse_weather(
+    raw_html: str, parsers: tuple[str, ...]
+) -> tuple[WetterOnlineData, dict[str, float], str, dict[str, str]]:
+    """Extract WetterOnlineData with the first of `parsers` that succeeds.
+
+    Returns the name of that parser along with the data, the phases and
+    the errors of the parsers tried before it, as this may run in another
+    process the caller logs them. Raises the error of the last parser when
+    all of them fail.
+    """
+    errors: dict[str, str] = {}
+    for parser in parsers[:-1]:
+        try:
+            return (*timed_parse_weather(raw_html, parser), parser, errors)
+        except Exception as error:  # noqa: BLE001
+            errors[parser] = repr(error)
+    return (*timed_parse_weather(raw_html, parsers[-1]), parsers[-1], errors)
+
+
+@dataclass(slots=True)
+class ParserResult:
+    """Outcome of one parser backend on one page."""
+
+    parser: str
+    seconds: float
+    data: WetterOnlineData | None = None
+    error: str | None = None
+
+
+def compare_parsers(
+    raw_html: str, parsers: tuple[str, ...] | None = None, repeat: int = 1
+) -> dict[str, ParserResult]:
+    """Run the parser backends, by default all of them, on the page.
+
+    The seconds are the fastest of `repeat` runs, a failing backend gets
+    its error instead of data.
+    """
+    results = {}
+    for parser in parsers or PARSERS:
+        result = ParserResult(parser, math.inf)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            try:
+                result.data = parse_weather(raw_html, parser)
+            except Exception as error:  # noqa: BLE001
+                result.error = repr(error)
+                break
+            result.seconds = min(result.seconds, time.perf_counter() - started)
+        results[parser] = result
+    return results
+
+
+def rank_parsers(raw_html: str) -> list[str]:
+    """Return the parser backends in the order to try them on this page.
+
+    Backends producing the same data as `RANK_REFERENCE` come first,
+    fastest first, followed by `REFERENCE_PARSER` and then the disagreeing
+    and failing backends as a last resort. `REFERENCE_PARSER` is several
+    times slower than the others and only run when `RANK_REFERENCE` fails,
+    its data is the reference then. When both fail every backend producing
+    data counts as agreeing.
+    """
+    results = compare_parsers(
+        raw_html, tuple(parser for parser in PARSERS if parser != REFERENCE_PARSER)
+    )
+    reference = results[RANK_REFERENCE].data
+    if reference is None:
+        results |= compare_parsers(raw_html, (REFERENCE_PARSER,))
+        reference = results[REFERENCE_PARSER].data
+
+    def rank(parser: str) -> tuple[int, float]:
+        if (result := results.get(parser)) is None:
+            return 1, 0.0
+        agrees = result.data is not None and reference in (None, result.data)
+        return 0 if agrees else 2, result.seconds
+
+    return sorted(PARSERS, key=rank)
+
+
+def parse_sections(
+    sections: dict[str, etree._Element],
+) -> tuple[WetterOnlineData, dict[str, float]]:
+    """Extract WetterOnlineData from sections collected while streaming.
+
+    Returns the seconds spent per extractor along with the data.
+    """
+    timing = RefreshTiming()
+    return _extract(LxmlWeatherUtils(sections=sections, timing=timing)), timing.phases
+
+
+@cache
+def _collect_executor() -> ThreadPoolExecutor:
+    """Return the collect worker of clients not given one, see `FetchScheduler`."""
+    return ThreadPoolExecutor(1, thread_name_prefix="wetteronline_collect")
+
+
+def _extract(weather_utils: WeatherUtils) -> WetterOnlineData:
+    phase = weather_utils.timing.phase
+    with phase("current_observations"):
+        current_observations = weather_utils.current_observations()
+    with phase("daily_forecast"):
+        daily_forecast = weather_utils.daily_forecast()
+    with phase("hourly_forecast"):
+        hourly_forecast = weather_utils.hourly_forecast()
+    return WetterOnlineData(current_observations, daily_forecast, hourly_forecast)
+
+
+@dataclass(frozen=True)
+class PageVersion:
+    """Validators identifying one published version of the page."""
+
+    etag: str | None
+    last_modified: str | None
+    digest: bytes | None = None
+    size: int = 0
+
+    @property
+    def modified_at(self) -> datetime | None:
+        """Return the Last-Modified time, if the server sent a valid one."""
+        if not self.last_modified:
+            return None
+        try:
+            modified_at = parsedate_to_datetime(self.last_modified)
+        except (TypeError, ValueError):
+            return None
+        return modified_at if modified_at.tzinfo else None
+
+
+@dataclass
+class RequestStats:
+    """Counters of the downloads and parses saved by conditional requests."""
+
+    requests: int = 0
+    parses: int = 0
+    not_modified: int = 0
+    unchanged_body: int = 0
+    bytes_downloaded: int = 0
+    bytes_saved: int = 0
+    parse_seconds: float = 0.0
+    parse_seconds_saved: float = 0.0
+
+
+OUTCOME_PARSED: Final = "parsed"
+OUTCOME_NOT_MODIFIED: Final = "not_modified"
+OUTCOME_UNCHANGED: Final = "unchanged"
+OUTCOME_FAILED: Final = "failed"
+
+
+@dataclass(slots=True)
+class RefreshTiming:
+    """Seconds spent per phase of one refresh and what it produced.
+
+    The network phases `dns`, `connect` and `ttfb` are only recorded when
+    the session was created with `trace_config()`, `dns` and `connect` only
+    when a new connection had to be opened.
+    """
+
+    finished_at: float = 0.0
+    outcome: str = OUTCOME_FAILED
+    phases: dict[str, float] = field(default_factory=dict)
+    response_bytes: int = 0
+    hourly_records: int = 0
+    daily_records: int = 0
+    parser: str | None = None
+    _started: dict[str, float] = field(default_factory=dict, repr=False)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the with block to the phase `name`."""
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def start(self, name: str) -> None:
+        """Start timing the phase `name`."""
+        self._started[name] = time.perf_counter()
+
+    def stop(self, name: str) -> None:
+        """Stop timing the phase `name`, unless it was never started."""
+        if (started := self._started.pop(name, None)) is not None:
+            self.phases[name] = (
+                self.phases.get(name, 0.0) + time.perf_counter() - started
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the timing with the phases in milliseconds."""
+        return {
+            "finished_at": self.finished_at,
+            "outcome": self.outcome,
+            "phases_ms": {
+                name: round(seconds * 1000, 3) for name, seconds in self.phases.items()
+            },
+            "response_bytes": self.response_bytes,
+            "hourly_records": self.hourly_records,
+            "daily_records": self.daily_records,
+            "parser": self.parser,
+        }
+
+
+class TimingHistory:
+    """The timings of the last `TIMING_HISTORY_SIZE` refreshes."""
+
+    def __init__(self, size: int = TIMING_HISTORY_SIZE) -> None:  # noqa: D107
+        self._timings: deque[RefreshTiming] = deque(maxlen=size)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._timings)
+
+    def __iter__(self) -> Iterator[RefreshTiming]:  # noqa: D105
+        return iter(self._timings)
+
+    @property
+    def last(self) -> RefreshTiming | None:
+        """Return the timing of the latest refresh."""
+        return self._timings[-1] if self._timings else None
+
+    def append(self, timing: RefreshTiming) -> None:
+        """Record the timing of a finished refresh."""
+        self._timings.append(timing)
+
+    def latest(self, phase: str) -> float | None:
+        """Return the phase of the latest refresh which went through it in ms."""
+        for timing in reversed(self._timings):
+            if phase in timing.phases:
+                return round(timing.phases[phase] * 1000, 3)
+        return None
+
+    def percentile(self, phase: str, percentile: float) -> float | None:
+        """Return a nearest-rank percentile of a phase in milliseconds.
+
+        Only refreshes which went through the phase are taken into account.
+        """
+        values = sorted(
+            timing.phases[phase] for timing in self._timings if phase in timing.phases
+        )
+        if not values:
+            return None
+        rank = max(math.ceil(percentile / 100 * len(values)), 1)
+        return round(values[rank - 1] * 1000, 3)
+
+    def summary(self) -> dict[str, dict[str, float | None]]:
+        """Return `TIMING_PERCENTILES` and the maximum of every phase."""
+        phases = dict.fromkeys(
+            name for timing in self._timings for name in timing.phases
+        )
+        return {
+            phase: {
+                **{
+                    f"p{percentile}": self.percentile(phase, percentile)
+                    for percentile in TIMING_PERCENTILES
+                },
+                "max": self.percentile(phase, 100),
+            }
+            for phase in phases
+        }
+
+
+def trace_config() -> TraceConfig:
+    """Return a TraceConfig timing the network phases of a refresh.
+
+    A session created with it records `dns`, `connect` and `ttfb` (from
+    sending the request headers until the response headers arrived) into
+    the RefreshTiming passed as `trace_request_ctx` of the request.
+    """
+
+    def on(action: str, phase: str) -> Callable[..., Any]:
+        async def callback(
+            session: ClientSession, context: SimpleNamespace, params: Any
+        ) -> None:
+            if isinstance(timing := context.trace_request_ctx, RefreshTiming):
+                getattr(timing, action)(phase)
+
+        return callback
+
+    config = TraceConfig()
+    config.on_dns_resolvehost_start.append(on("start", "dns"))
+    config.on_dns_resolvehost_end.append(on("stop", "dns"))
+    config.on_connection_create_start.append(on("start", "connect"))
+    config.on_connection_create_end.append(on("stop", "connect"))
+    config.on_request_headers_sent.append(on("start", "ttfb"))
+    config.on_request_end.append(on("stop", "ttfb"))
+    return config
+
+
+@dataclass
+class CoalescingStats:
+    """Counters of the calls shared by SingleFlight."""
+
+    calls: int = 0
+    flights: int = 0
+    coalesced: int = 0
+    ttl_hits: int = 0
+
+
+class SingleFlight:
+    """Share one in-flight call per key between concurrent callers.
+
+    Callers arriving while a call for their key is running wait for its
+    result instead of starting their own. Successful results are handed
+    out for another `ttl` seconds. The call runs as a task shielded from
+    the callers, a cancelled caller does not cancel it for the others.
+    """
+
+    def __init__(self, ttl: float = COALESCE_TTL) -> None:  # noqa: D107
+        self.ttl = ttl
+        self.stats = CoalescingStats()
+        self._flights: dict[str, asyncio.Task[Any]] = {}
+        self._results: dict[str, tuple[float, Any]] = {}
+
+    async def async_call[T](self, key: str, function: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of `function`, shared by all callers of `key`."""
+        self.stats.calls += 1
+        loop = asyncio.get_running_loop()
+        if (result := self._results.get(key)) is not None:
+            if loop.time() - result[0] < self.ttl:
+                self.stats.ttl_hits += 1
+                return result[1]
+            del self._results[key]
+
+        if (flight := self._flights.get(key)) is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.flights += 1
+            flight = self._flights[key] = loop.create_task(
+                function(), name=f"WetterOnline {key}"
+            )
+            flight.add_done_callback(partial(self._landed, key))
+        return await asyncio.shield(flight)
+
+    def _landed(self, key: str, flight: asyncio.Task[Any]) -> None:
+        del self._flights[key]
+        # Retrieving the exception also keeps asyncio from logging it when
+        # every caller went away.
+        if not flight.cancelled() and flight.exception() is None and self.ttl:
+            self._results[key] = (asyncio.get_running_loop().time(), flight.result())
 
 
 class WetterOnline:
     """Main class to perform WetterOnline requests."""
 
-    def __init__(self, session: ClientSession, url: str) -> None:  # noqa: D107
+    def __init__(  # noqa: D107
+        self,
+        session: ClientSession,
+        url: str,
+        executor: Executor | None = None,
+        parser: str = DEFAULT_PARSER,
+        streaming: bool = False,
+        network_timeout: float = NETWORK_TIMEOUT,
+        parse_timeout: float = PARSE_TIMEOUT,
+        fetch_slot: Callable[[], AbstractAsyncContextManager] = nullcontext,
+        base_url: str = BASE_URL,
+        single_flight: SingleFlight | None = None,
+        proxy_url: str | None = None,
+        collect_executor: ThreadPoolExecutor | None = None,
+    ) -> None:
         self._session = session
+        self._collect_executor = collect_executor
+        self._proxy_url = proxy_url.rstrip("/") if proxy_url else None
+        self.single_flight = single_flight or SingleFlight()
+        self._fetch_slot = fetch_slot
+        self._executor = executor
+        self._parser = parser
+        self.parser_order: list[str] | None = None
+        self._parses_since_rank = 0
+        self._streaming = streaming
+        self._network_timeout = network_timeout
+        self._parse_timeout = parse_timeout
+        self._version: PageVersion | None = None
+        self._last_data: WetterOnlineData | None = None
+        self._last_parse_seconds = 0.0
+        self.stats = RequestStats()
+        self.timings = TimingHistory()
+        self.nowcast_timings = TimingHistory()
         url = url.lstrip("/")
-        self.complete_url = f"https://www.wetteronline.de/{url}"
+        self.url = f"/{url}"
+        self.complete_url = f"{base_url.rstrip('/')}/{url}"
+
+    @property
+    def last_modified(self) -> datetime | None:
+        """Return the Last-Modified time of the last parsed page."""
+        return self._version.modified_at if self._version else None
 
     async def async_get_weather(self) -> WetterOnlineData:
-        """Fetch data from WetterOnline."""
+        """Fetch data from WetterOnline.
+
+        Concurrent calls for the same url, also from other clients sharing
+        the SingleFlight, share one fetch and parse.
+        """
+        return await self.single_flight.async_call(
+            self.complete_url, self._async_get_weather
+        )
+
+    async def _async_get_weather(self) -> WetterOnlineData:
+        """Fetch and parse the page.
+
+        The previous result is returned without parsing when the server
+        answers 304 Not Modified or sends the same body as last time.
+        Waiting for the fetch slot does not count against the network
+        budget. The time spent per phase is added to `timings`, for failed
+        refreshes as well.
+        """
+        timing = RefreshTiming()
+        started = time.perf_counter()
+        try:
+            timing.start("queued")
+            async with self._fetch_slot():
+                timing.stop("queued")
+                if self._proxy_url:
+                    return await self._async_get_weather_proxied(timing)
+                async with timeout(self._network_timeout):
+                    if self._streaming:
+                        page, version = await self._async_fetch_sections(timing)
+                    else:
+                        page, version = await self.async_fetch(timing)
+            # The slot is released once the body has arrived, the parse
+            # must not keep the downloads of other locations waiting.
+            if page is None:
+                return self._unchanged(timing)
+
+            with timing.phase("parse"):
+                async with timeout(self._parse_timeout):
+                    if self._streaming:
+                        data = await self._async_parse_sections(page, timing)
+                    else:
+                        data = await self.async_parse(page, timing)
+            return self._store(data, version, timing)
+        finally:
+            timing.phases["total"] = time.perf_counter() - started
+            timing.finished_at = time.time()
+            self.timings.append(timing)
+
+    async def async_fetch(
+        self, timing: RefreshTiming | None = None
+    ) -> tuple[str | None, PageVersion]:
+        """Download the raw page html.
+
+        The html is None when the page did not change since the last
+        successful parse.
+        """
+        timing = timing or RefreshTiming()
         async with self._session.get(
-            self.complete_url, headers=HTTP_HEADERS, allow_redirects=False
+            self.complete_url,
+            headers=self._request_headers(),
+            allow_redirects=False,
+            trace_request_ctx=timing,
         ) as resp:
-            raw_html = html.unescape(await resp.text())
-            weather_utils = WeatherUtils(raw_html)
-            return WetterOnlineData(
-                current_observations=weather_utils.current_observations(),
-                daily_forecast=weather_utils.daily_forecast(),
-                hourly_forecast=weather_utils.hourly_forecast(),
+            self.stats.requests += 1
+            if self._not_modified(resp):
+                timing.outcome = OUTCOME_NOT_MODIFIED
+                return None, self._version
+            resp.raise_for_status()
+
+            body, version = await self._async_read(resp, timing)
+            if body is None:
+                return None, self._version
+            return await resp.text(), version
+
+    async def _async_get_weather_proxied(
+        self, timing: RefreshTiming
+    ) -> WetterOnlineData:
+        """Fetch the data a caching proxy already parsed, see `proxy.server`.
+
+        The proxy answers with the compact form of the data, only decoding
+        it is left. Its ETag and the Last-Modified time of the page are
+        used like the ones of the page itself.
+        """
+        async with (
+            timeout(self._network_timeout),
+            self._session.get(
+                f"{self._proxy_url}{PROXY_WEATHER_PATH}",
+                params={"url": self.url},
+                headers=self._request_headers(),
+                trace_request_ctx=timing,
+            ) as resp,
+        ):
+            self.stats.requests += 1
+            if self._not_modified(resp):
+                timing.outcome = OUTCOME_NOT_MODIFIED
+                return self._unchanged(timing)
+            resp.raise_for_status()
+            body, version = await self._async_read(resp, timing)
+        if body is None:
+            return self._unchanged(timing)
+
+        with timing.phase("parse"):
+            data = WetterOnlineData.from_compact(json.loads(body))
+        timing.parser = "proxy"
+        return self._store(data, version, timing)
+
+    async def _async_read(
+        self, resp: ClientResponse, timing: RefreshTiming
+    ) -> tuple[bytes | None, PageVersion]:
+        """Read the body, which is None when it did not change."""
+        with timing.phase("body"):
+            body = await resp.read()
+        self.stats.bytes_downloaded += len(body)
+        timing.response_bytes = len(body)
+        version = PageVersion(
+            resp.headers.get(hdrs.ETAG),
+            resp.headers.get(hdrs.LAST_MODIFIED),
+            hashlib.blake2b(body, digest_size=16).digest(),
+            len(body),
+        )
+        if self._version is not None and self._version.digest == version.digest:
+            self.stats.unchanged_body += 1
+            timing.outcome = OUTCOME_UNCHANGED
+            return None, self._version
+        return body, version
+
+    async def async_parse(
+        self, raw_html: str, timing: RefreshTiming | None = None
+    ) -> WetterOnlineData:
+        """Parse the raw page html in the executor.
+
+        Without an executor the event loop's default thread pool is used.
+        Cancelling the returned awaitable cancels the job if it has not
+        started yet, a running job finishes in the background and its
+        result is discarded. The parse phases are added to `timing`.
+
+        With `PARSER_AUTO` the backends are ranked by `rank_parsers` on the
+        first page and tried in `parser_order` from then on. They are
+        ranked again on the next page once the first one failed, and every
+        `RANK_INTERVAL` pages to catch a backend that still succeeds but
+        no longer agrees with `RANK_REFERENCE`.
+        """
+        timing = timing or RefreshTiming()
+        loop = asyncio.get_running_loop()
+        if self._parser != PARSER_AUTO:
+            data, phases = await loop.run_in_executor(
+                self._executor, timed_parse_weather, raw_html, self._parser
+            )
+            timing.phases.update(phases)
+            timing.parser = self._parser
+            return data
+
+        if self.parser_order is None or self._parses_since_rank >= RANK_INTERVAL:
+            with timing.phase("rank_parsers"):
+                parser_order = await loop.run_in_executor(
+                    self._executor, rank_parsers, raw_html
+                )
+            if self.parser_order not in (None, parser_order):
+                _LOGGER.debug(
+                    "Parsers for %s ranked %s, were %s",
+                    self.url,
+                    parser_order,
+                    self.parser_order,
+                )
+            self.parser_order = parser_order
+            self._parses_since_rank = 0
+        data, phases, parser, errors = await loop.run_in_executor(
+            self._executor, auto_parse_weather, raw_html, tuple(self.parser_order)
+        )
+        self._parses_since_rank += 1
+        for failed, error in errors.items():
+            _LOGGER.warning(
+                "Parser %s failed on %s, used %s instead: %s",
+                failed,
+                self.url,
+                parser,
+                error,
+            )
+        timing.phases.update(phases)
+        timing.parser = parser
+        if errors:
+            self.parser_order = None
+        return data
+
+    async def _async_fetch_sections(
+        self, timing: RefreshTiming
+    ) -> tuple[dict[str, etree._Element] | None, PageVersion]:
+        """Fetch the page chunk by chunk for streaming mode.
+
+        The chunks go straight into the incremental lxml parser of a
+        SectionCollector and the connection is closed as soon as all
+        sections have been seen, so the rest of the page is never
+        downloaded. As the body is not read in full only the 304 Not
+        Modified short-circuit applies, the sections are None then.
+        """
+        async with self._session.get(
+            self.complete_url,
+            headers=self._request_headers(),
+            allow_redirects=False,
+            trace_request_ctx=timing,
+        ) as resp:
+            self.stats.requests += 1
+            if self._not_modified(resp):
+                timing.outcome = OUTCOME_NOT_MODIFIED
+                return None, self._version
+            resp.raise_for_status()
+
+            sections = await self._async_collect(resp, SECTIONS, timing)
+            return sections, PageVersion(
+                resp.headers.get(hdrs.ETAG),
+                resp.headers.get(hdrs.LAST_MODIFIED),
+                size=timing.response_bytes,
             )
 
+    async def _async_parse_sections(
+        self, sections: dict[str, etree._Element], timing: RefreshTiming
+    ) -> WetterOnlineData:
+        """Extract the data from the collected sections.
+
+        The sections are lxml trees which cannot leave the process, the
+        extraction therefore always runs in the default thread pool.
+        """
+        data, phases = await asyncio.get_running_loop().run_in_executor(
+            None, parse_sections, sections
+        )
+        timing.phases.update(phases)
+        timing.parser = PARSER_LXML
+        return data
+
+    async def async_get_nowcast(self) -> dict[str, Any]:
+        """Fetch only the current observations, coalesced like the weather."""
+        return await self.single_flight.async_call(
+            f"{self.complete_url} nowcast", self._async_get_nowcast
+        )
+
+    async def _async_get_nowcast(self) -> dict[str, Any]:
+        """Fetch and extract the current observations.
+
+        The page is streamed like in streaming mode, but only the small
+        sections of the current observations at the top of the page are
+        collected and the connection is closed right after them. The
+        extraction is cheap enough to run in the event loop. Neither the
+        conditional request validators nor the result of the full refresh
+        are touched, the time spent is added to `nowcast_timings`.
+        """
+        timing = RefreshTiming()
+        started = time.perf_counter()
+        try:
+            timing.start("queued")
+            async with self._fetch_slot():
+                timing.stop("queued")
+                if self._proxy_url:
+                    return await self._async_get_nowcast_proxied(timing)
+                async with (
+                    timeout(self._network_timeout),
+                    self._session.get(
+                        self.complete_url,
+                        headers=HTTP_HEADERS,
+                        allow_redirects=False,
+                        trace_request_ctx=timing,
+                    ) as resp,
+                ):
+                    self.stats.requests += 1
+                    resp.raise_for_status()
+                    sections = await self._async_collect(resp, NOWCAST_SECTIONS, timing)
+
+            with timing.phase("current_observations"):
+                current_observations = LxmlWeatherUtils(
+                    sections=sections
+                ).current_observations()
+            timing.outcome = OUTCOME_PARSED
+            return current_observations
+        finally:
+            timing.phases["total"] = time.perf_counter() - started
+            timing.finished_at = time.time()
+            self.nowcast_timings.append(timing)
+
+    async def _async_get_nowcast_proxied(self, timing: RefreshTiming) -> dict[str, Any]:
+        """Fetch the current observations from the data of a caching proxy.
+
+        The proxy refreshes a page at most once per its interval, more
+        frequent nowcasts return the same observations.
+        """
+        async with (
+            timeout(self._network_timeout),
+            self._session.get(
+                f"{self._proxy_url}{PROXY_WEATHER_PATH}",
+                params={"url": self.url},
+                headers=HTTP_HEADERS,
+                trace_request_ctx=timing,
+            ) as resp,
+        ):
+            self.stats.requests += 1
+            resp.raise_for_status()
+            with timing.phase("body"):
+                body = await resp.read()
+        self.stats.bytes_downloaded += len(body)
+        timing.response_bytes = len(body)
+        with timing.phase("current_observations"):
+            current_observations = json.loads(body)[SECTION_CURRENT]
+        timing.outcome = OUTCOME_PARSED
+        return current_observations
+
+    async def async_validate(self) -> None:
+        """Check that the page carries the markers of all sections.
+
+        Meant for adding a location: the body is only scanned for the ids
+        of `SECTIONS` without parsing it, and the connection is closed once
+        all of them have been seen. Raises ValueError when a marker is
+        missing. Neither the parser dependencies are imported nor the
+        conditional request validators touched.
+        """
+        missing = set(SECTIONS)
+        tail = b""
+        async with (
+            timeout(self._network_timeout),
+            self._session.get(
+                self.complete_url, headers=HTTP_HEADERS, allow_redirects=False
+            ) as resp,
+        ):
+            self.stats.requests += 1
+            resp.raise_for_status()
+            async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                self.stats.bytes_downloaded += len(chunk)
+                # Keep the end of the previous chunk, a marker may be split.
+                window = tail + chunk
+                missing.difference_update(
+                    match.decode() for match in _SECTION_MARKER.findall(window)
+                )
+                if not missing:
+                    resp.close()
+                    return
+                tail = window[-_SECTION_MARKER_TAIL:]
+        raise ValueError(f"Sections {sorted(missing)} not found in the page")
+
+    async def _async_collect(
+        self, resp: ClientResponse, sections: dict[str, str], timing: RefreshTiming
+    ) -> dict[str, etree._Element]:
+        """Feed the body into a SectionCollector until it has all sections.
+
+        Parsing a chunk takes about as long as parsing the same share of
+        the whole page, so the chunks are fed in the collect executor. An
+        lxml parser must stay in the thread that created it, which is why
+        that executor has a single worker. The download goes on while the
+        worker is busy and the chunks which arrived meanwhile are fed in
+        one go, so a slow worker means fewer, larger hops instead of a
+        growing queue. The first call imports lxml in the default thread
+        pool.
+        """
+        loop = asyncio.get_running_loop()
+        if "lxml.etree" not in IMPORT_SECONDS:
+            await loop.run_in_executor(None, import_parser_module, "lxml.etree", timing)
+        executor = self._collect_executor or _collect_executor()
+        collector = await loop.run_in_executor(
+            executor, SectionCollector, resp.charset or "utf-8", sections
+        )
+        size = 0
+        buffered: list[bytes] = []
+        feeding: asyncio.Future[None] | None = None
+        with timing.phase("body"):
+            try:
+                async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    size += len(chunk)
+                    buffered.append(chunk)
+                    if feeding is not None:
+                        if not feeding.done():
+                            continue
+                        await feeding
+                        if collector.complete:
+                            resp.close()
+                            break
+                    feeding = loop.run_in_executor(
+                        executor, collector.feed, b"".join(buffered)
+                    )
+                    buffered.clear()
+                else:
+                    if feeding is not None:
+                        await feeding
+                    if buffered and not collector.complete:
+                        await loop.run_in_executor(
+                            executor, collector.feed, b"".join(buffered)
+                        )
+            except BaseException:
+                # Nobody awaits a pending feed anymore, its error would be
+                # logged as never retrieved.
+                if feeding is not None:
+                    feeding.cancel()
+                raise
+        self.stats.bytes_downloaded += size
+        timing.response_bytes = size
+        return await loop.run_in_executor(executor, collector.close)
+
+    def _request_headers(self) -> dict[str, str]:
+        if self._version is None:
+            return HTTP_HEADERS
+        headers = dict(HTTP_HEADERS)
+        if self._version.etag:
+            headers[hdrs.IF_NONE_MATCH] = self._version.etag
+        if self._version.last_modified:
+            headers[hdrs.IF_MODIFIED_SINCE] = self._version.last_modified
+        return headers
+
+    def _not_modified(self, resp: ClientResponse) -> bool:
+        if resp.status != HTTPStatus.NOT_MODIFIED or self._version is None:
+            return False
+        self.stats.not_modified += 1
+        self.stats.bytes_saved += self._version.size
+        return True
+
+    def _unchanged(self, timing: RefreshTiming) -> WetterOnlineData:
+        self._count_records(timing, self._last_data)
+        self.stats.parse_seconds_saved += self._last_parse_seconds
+        return self._last_data
+
+    def _store(
+        self, data: WetterOnlineData, version: PageVersion, timing: RefreshTiming
+    ) -> WetterOnlineData:
+        # The version is only remembered together with data parsed from it,
+        # a page which failed to parse must not short-circuit later on.
+        parse_seconds = timing.phases["parse"]
+        self._version = version
+        self._last_data = data
+        self._last_parse_seconds = parse_seconds
+        self.stats.parses += 1
+        self.stats.parse_seconds += parse_seconds
+        timing.outcome = OUTCOME_PARSED
+        self._count_records(timing, data)
+        return data
+
+    @staticmethod
+    def _count_records(timing: RefreshTiming, data: WetterOnlineData) -> None:
+        timing.hourly_records = len(data.hourly_forecast)
+        timing.daily_records = len(data.daily_forecast)
+
+
+def decode_hourly_script(script: str) -> dict[str, Any]:
+    """Decode the object literal pushed by one hourly forecast script.
+
+    The `key: value` pairs between `({` and `})` are scanned in a single
+    pass. Keys are renamed through `HOURLY_REPLACE_KEYS` and skipped when
+    listed in `HOURLY_SKIP_KEYS`, quoted values are kept verbatim and bare
+    values are converted to int or float where possible.
+    """
+    start = script.find("({")
+    end = script.find("})", start)
+    if start < 0 or end < 0:
+        raise ValueError(f"No object literal found in hourly script {script!r}")
+
+    hourly_data: dict[str, Any] = {}
+    for match in _HOURLY_ENTRY.finditer(script, start + 2, end):
+        key, double_quoted, single_quoted, bare = match.groups()
+        if key in HOURLY_SKIP_KEYS:
+            continue
+        if double_quoted is not None:
+            value: Any = _unescape_js(double_quoted)
+        elif single_quoted is not None:
+            value = _unescape_js(single_quoted)
+        else:
+            value = _number(bare.strip())
+        hourly_data[HOURLY_REPLACE_KEYS.get(key, key)] = value
+    return hourly_data
+
+
+def _unescape_js(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return _JS_ESCAPE.sub(r"\1", value)
+
+
+def _number(value: str) -> int | float | str:
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+HOURLY_REPLACE_KEYS: Final[dict[str, str]] = {
+    "windGusts": "windGustsBft",
+    "windDirection": "windDirectionLong",
+    "windDirectionShortSector": "windDirection",
+}
+HOURLY_SKIP_KEYS: Final = frozenset({"docrootVersion"})
+
+
+def _leading_number(value: Any) -> int | float | None:
+    """Return the first number of a cell like "5 Std." or "0,4 l/m²"."""
+    if not isinstance(value, str):
+        return value
+    if (match := _NUMBER.search(value)) is None:
+        return None
+    return _number(match[0].replace(",", "."))
+
+
+def _header_date(header: str, today: date) -> date:
+    """Return the date of a table header like "Mo, 12.10." closest to today.
+
+    The header has no year, a January header seen in December is in the
+    next year and a December header seen in January in the last one.
+    """
+    day, month = (int(part) for part in header.rpartition(", ")[2].split(".")[:2])
+    dates = []
+    for year in (today.year - 1, today.year, today.year + 1):
+        # The 29th of February only exists in leap years.
+        with suppress(ValueError):
+            dates.append(date(year, month, day))
+    return min(dates, key=lambda candidate: abs(candidate - today))
+
+
+def _convert(spec: FieldSpec, value: Any) -> Any:
+    if value is not None and spec.convert is not None:
+        value = spec.convert(value)
+    if value is None and spec.required:
+        raise ValueError(f"No value for {spec.field} from {spec.key}")
+    return value
+
+
+HOURLY_FIELDS: Final[tuple[FieldSpec, ...]] = (
+    FieldSpec("temperature", "temperature", required=True),
+    FieldSpec("apparent_temperature", "apparentTemperature"),
+    FieldSpec("humidity", "humidity"),
+    FieldSpec("symbol_text", "symbolText", sys.intern, True),
+    FieldSpec("precipitation_probability", "precipitationProbability"),
+    FieldSpec("precipitation", "precipitationAmount", _leading_number),
+    FieldSpec("wind_speed", "windSpeedKmh"),
+    FieldSpec("wind_bearing", "windDirection"),
+    FieldSpec("cloud_coverage", "cloudCover"),
+    FieldSpec("uv_index", "uvIndex"),
+    FieldSpec("condition", "symbolText", symbol_condition),
+)
+DAILY_ROWS: Final[tuple[RowSpec, ...]] = (
+    RowSpec(
+        "max_temperature", "Maximum Temperature", _leading_number, True, CELL_VALUE
+    ),
+    RowSpec(
+        "min_temperature", "Minimum Temperature", _leading_number, True, CELL_VALUE
+    ),
+    RowSpec("sun_hours", "sun_teaser", _leading_number, True),
+    RowSpec("precipitation_probability", "precipitation_teaser", _leading_number, True),
+    RowSpec("precipitation", "precipitation_amount_teaser", _leading_number),
+    RowSpec("wind_speed", "wind_teaser", _leading_number),
+    RowSpec("wind_gust_speed", "gust_teaser", _leading_number),
+    RowSpec("cloud_coverage", "cloud_teaser", _leading_number),
+    RowSpec("uv_index", "uv_teaser", _leading_number),
+)
+_DAILY_ROWS_BY_KEY: Final = {spec.key: spec for spec in DAILY_ROWS}
+_DAY_OFFSETS: Final = {"heute": 0, "morgen": 1}
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+_HOURLY_ENTRY = re.compile(
+    r"""(\w+)\s*:\s*(?:"((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)'|([^,\n]*))"""
+)
+_JS_ESCAPE = re.compile(r"\\(.)")
+
+
+IMPORT_SECONDS: dict[str, float] = {}
+
+
+def import_parser_module(name: str, timing: RefreshTiming | None = None) -> ModuleType:
+    """Import a parser dependency on first use.
+
+    The seconds the import took are kept in `IMPORT_SECONDS` and added as
+    `import:<name>` phase to the timing of the refresh paying for it. The
+    first call may block on the import, call it from an executor.
+    """
+    if name not in IMPORT_SECONDS:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        IMPORT_SECONDS[name] = time.perf_counter() - started
+        if timing is not None:
+            timing.phases[f"import:{name}"] = IMPORT_SECONDS[name]
+    return sys.modules[name]
+
+
+@cache
+def _compiled_xpaths() -> SimpleNamespace:
+    etree = import_parser_module("lxml.etree")
+    return SimpleNamespace(
+        text=etree.XPath("string()"),
+        value_text=etree.XPath(
+            "string(.//div[contains(concat(' ', normalize-space(@class), ' '),"
+            " ' value ')])"
+        ),
+        first_script_text=etree.XPath("string(.//script)"),
+        scripts=etree.XPath(".//script"),
+        headers=etree.XPath(".//th"),
+        first_span_text=etree.XPath("string(.//span)"),
+        spans=etree.XPath(".//span"),
+        divs=etree.XPath(".//div"),
+    )
+
+
+def _xpaths(timing: RefreshTiming) -> SimpleNamespace:
+    import_parser_module("lxml.etree", timing)
+    return _compiled_xpaths()
+
 
 class WeatherUtils:
-    """Logic for extraction weather data from raw html."""
+    """Logic for extraction weather data from raw html.
+
+    This is the bs4 backend and the base of all parser backends. The
+    extraction only goes through the hooks `_nowcast_temperature`,
+    `_current_observations_script`, `_hourly_scripts`, `_first_date`,
+    `_weather_rows` and `_row_cells`, a backend implements them on its own
+    representation of the page and is registered in `PARSERS`.
+    """
 
-    def __init__(self, raw_html=None) -> None:  # noqa: D107
+    def __init__(  # noqa: D107
+        self, raw_html=None, timing: RefreshTiming | None = None
+    ) -> None:
         self.timezone = None
-        self.soup = bs4.BeautifulSoup(raw_html, "lxml")
+        self.timing = timing or RefreshTiming()
+        with self.timing.phase("unescape"):
+            unescaped = html.unescape(raw_html)
+        bs4 = import_parser_module("bs4", self.timing)
+        with self.timing.phase("soup"):
+            self.soup = bs4.BeautifulSoup(unescaped, "lxml")
 
     def current_observations(self) -> dict[str, Any]:
         """Return the current observations 4 day forecast of the given `url`."""
 
-        temperature = (
-            self.soup.find("div", {"id": "nowcast-card-temperature"})
-            .find("div", {"class": "value"})
-            .text
-        )
-        temperature = int(temperature)
+        temperature = int(self._nowcast_temperature())
         current_observations = {"temperature": temperature}
 
-        current_observations_raw = (
-            self.soup.find("div", {"id": "product_display"}).find("script").text
-        )
+        current_observations_raw = self._current_observations_script()
 
         def clean(arg):
             return arg.strip().strip(",").strip('"')
@@ -87,99 +1336,353 @@ class WeatherUtils:
 
         return current_observations
 
-    def hourly_forecast(self) -> list[dict[str, Any]]:
-        """Return the hourly forecast of the given `url` for today and tomorrow."""
+    def hourly_forecast(self) -> list[HourlyForecast]:
+        """Return the hourly forecast of the given `url` for today and tomorrow.
 
-        today = datetime.combine(datetime.now(), MIDNIGHT, self.timezone)
-        tomorrow = today + timedelta(days=1)
+        The fields are filled as listed in `HOURLY_FIELDS`.
+        """
 
-        scripts = self.soup.find("div", {"id": "hourly-container"}).find_all("script")
-        forecast: list[dict[str, Any]] = []
+        axis = time_axis(self.timezone, datetime.now(self.timezone).date())
 
-        replace_keys = {
-            "windGusts": "windGustsBft",
-            "windDirection": "windDirectionLong",
-            "windDirectionShortSector": "windDirection",
-        }
-        for script in scripts:
-            script = str(script).split("({")[1].split("})")[0].strip().replace(" ", "")
-            hourly_data_raw = []
-            for entry in script.split("\n"):
-                key = entry.split(":")[0]
-                value = entry.split(":")[1]
-                key = replace_keys.get(key, key)
-                hourly_data_raw.append(f'"{key}": {value}')
-            hourly_data = ast.literal_eval("{" + "".join(hourly_data_raw) + "}")
-
-            ## delete useless key
-            hourly_data.pop("docrootVersion", None)
+        forecast: list[HourlyForecast] = []
+
+        for script in self._hourly_scripts():
+            hourly_data = decode_hourly_script(script)
 
             daySynonym = hourly_data["daySynonym"]
-            match daySynonym:
-                case "heute":
-                    forecast_day = today
-                case "morgen":
-                    forecast_day = tomorrow
-                case _:
+            if (offset := _DAY_OFFSETS.get(daySynonym)) is None:
+                raise ValueError(
+                    f"daySynonym {daySynonym} is different than 'heute' and 'morgen'"
+                )
+
+            forecast.append(
+                HourlyForecast(
+                    datetime=axis.hours[offset][hourly_data["hour"]],
+                    **{
+                        spec.field: _convert(spec, hourly_data.get(spec.key))
+                        for spec in HOURLY_FIELDS
+                    },
+                )
+            )
+
+        return forecast
+
+    def daily_forecast(self) -> list[DailyForecast]:
+        """Return the full 4 day forecast of the given `url`.
+
+        The rows of the `weather` table are walked once and read as listed
+        in `DAILY_ROWS`. An optional row without a value for every day is
+        left out, its field is None.
+        """
+
+        ## get dates first
+        header, days = self._first_date()
+        axis = time_axis(
+            self.timezone, _header_date(header, datetime.now(self.timezone).date())
+        )
+        dates = [axis.midnight(offset) for offset in range(days)]
+
+        columns: dict[str, list[Any]] = {}
+        for keys, row in self._weather_rows():
+            for key in keys:
+                spec = _DAILY_ROWS_BY_KEY.get(key)
+                if spec is None or spec.field in columns:
+                    continue
+                values = self._row_cells(row, spec.cell)
+                if len(values) != days:
+                    if not spec.required:
+                        continue
                     raise ValueError(
-                        f"daySynonym {daySynonym} is different than 'heute' and 'morgen'"
+                        f"Row {key} has {len(values)} values for {days} days"
                     )
+                columns[spec.field] = [_convert(spec, value) for value in values]
 
-            hour = hourly_data.pop("hour")
-            hourly_data["datetime"] = forecast_day.replace(hour=hour)
+        return [
+            DailyForecast(
+                datetime=day_date,
+                **{
+                    spec.field: (
+                        columns[spec.field][day]
+                        if spec.field in columns
+                        else _convert(spec, None)
+                    )
+                    for spec in DAILY_ROWS
+                },
+            )
+            for day, day_date in enumerate(dates)
+        ]
 
-            forecast.append(hourly_data)
+    def _nowcast_temperature(self) -> str:
+        return (
+            self.soup.find("div", {"id": "nowcast-card-temperature"})
+            .find("div", {"class": "value"})
+            .text
+        )
 
-        return forecast
+    def _current_observations_script(self) -> str:
+        return self.soup.find("div", {"id": "product_display"}).find("script").text
 
-    def daily_forecast(self) -> list[dict[str, Any]]:
-        """Return the full 4 day forecast of the given `url`."""
+    def _hourly_scripts(self) -> list[str]:
+        scripts = self.soup.find("div", {"id": "hourly-container"}).find_all("script")
+        return [str(script) for script in scripts]
 
-        ## get dates first
-        forecast: list[dict[str, Any]] = []
-
-        forecast_date = None
-        for i in self.soup.find("table", {"id": "daterow"}).find_all("th"):
-            if forecast_date is None:
-                date = i.find("span").text
-                if "," in list(date):
-                    date = date.split(", ")[1]
-                date += str(datetime.now().year)
-                forecast_date = datetime.strptime(date, "%d.%m.%Y")
-                forecast_date = datetime.combine(forecast_date, MIDNIGHT, self.timezone)
-            else:
-                forecast_date = forecast_date + timedelta(days=1)
-            forecast.append({"datetime": forecast_date})
+    def _first_date(self) -> tuple[str, int]:
+        headers = self.soup.find("table", {"id": "daterow"}).find_all("th")
+        return headers[0].find("span").text, len(headers)
+
+    def _weather_rows(self) -> Iterator[tuple[tuple[str, ...], Any]]:
+        """Yield the id and class and the element of each weather table row."""
+        for row in self.soup.find("table", {"id": "weather"}).find_all("tr"):
+            yield (row.get("id"), " ".join(row.get("class", ()))), row
+
+    def _row_cells(self, row: Any, cell: str) -> list[str]:
+        if cell == CELL_VALUE:
+            return [str(div.find_all("span")[1].text) for div in row.find_all("div")]
+        return [str(span.text) for span in row.find_all("span")]
+
+
+class LxmlWeatherUtils(WeatherUtils):
+    """Extraction of weather data keeping only the page sections it reads.
+
+    The page is fed through an incremental lxml parser and every element
+    outside of `SECTIONS` is dropped as soon as it is closed, so the tree
+    never holds the ads and navigation around the data. Entities are
+    unescaped per extracted text node instead of over the whole page.
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        raw_html=None,
+        sections: dict[str, etree._Element] | None = None,
+        timing: RefreshTiming | None = None,
+    ) -> None:
+        self.timezone = None
+        self.timing = timing or RefreshTiming()
+        self._xpath = _xpaths(self.timing)
+        if sections is None:
+            with self.timing.phase("sections"):
+                collector = SectionCollector()
+                collector.feed(raw_html)
+                sections = collector.close()
+        self.sections = sections
 
-        weather_table = self.soup.find("table", {"id": "weather"})
-        # max temp
-        tags = list(
-            weather_table.find("tr", {"class": "Maximum Temperature"}).find_all("div")
+    def _nowcast_temperature(self) -> str:
+        return _unescaped(
+            self._xpath.value_text(self.sections["nowcast-card-temperature"])
         )
-        for i, tag in enumerate(tags):
-            tag_span = tag.find_all("span")[1]
-            forecast[i]["maxTemperature"] = int(str(tag_span.text).rstrip("°"))
 
-        # min temp
-        tags = list(
-            weather_table.find("tr", {"class": "Minimum Temperature"}).find_all("div")
+    def _current_observations_script(self) -> str:
+        return _unescaped(
+            self._xpath.first_script_text(self.sections["product_display"])
         )
-        for i, tag in enumerate(tags):
-            tag_span = tag.find_all("span")[1]
-            forecast[i]["minTemperature"] = int(str(tag_span.text).rstrip("°"))
-
-        # sun hours
-        tags = list(weather_table.find("tr", {"id": "sun_teaser"}).find_all("span"))
-        for i, tag in enumerate(tags):
-            forecast[i]["sunHours"] = int(str(tag.text).lstrip().rstrip(" Std.\n"))
-
-        # precipitation probability
-        tags = list(
-            weather_table.find("tr", {"id": "precipitation_teaser"}).find_all("span")
+
+    def _hourly_scripts(self) -> list[str]:
+        return [
+            _unescaped(script.text or "")
+            for script in self._xpath.scripts(self.sections["hourly-container"])
+        ]
+
+    def _first_date(self) -> tuple[str, int]:
+        headers = self._xpath.headers(self.sections["daterow"])
+        return _unescaped(self._xpath.first_span_text(headers[0])), len(headers)
+
+    def _weather_rows(self) -> Iterator[tuple[tuple[str, ...], etree._Element]]:
+        for row in self.sections["weather"].iter("tr"):
+            yield (row.get("id"), row.get("class")), row
+
+    def _row_cells(self, row: etree._Element, cell: str) -> list[str]:
+        if cell == CELL_VALUE:
+            return [
+                _unescaped(self._xpath.text(self._xpath.spans(div)[1]))
+                for div in self._xpath.divs(row)
+            ]
+        return [_unescaped(self._xpath.text(span)) for span in self._xpath.spans(row)]
+
+
+class RegexWeatherUtils(WeatherUtils):
+    """Extraction of weather data by scanning the raw html.
+
+    No tree is built. Each section is cut out of the page by matching its
+    opening and closing tags, the scripts, rows and cells are then found
+    with regular expressions within it. This is the fastest backend, but it
+    relies on the markup being well formed, `rank_parsers` only prefers it
+    while it agrees with the reference backend.
+    """
+
+    def __init__(  # noqa: D107
+        self, raw_html=None, timing: RefreshTiming | None = None
+    ) -> None:
+        self.timezone = None
+        self.timing = timing or RefreshTiming()
+        with self.timing.phase("sections"):
+            self.sections = {
+                section_id: _cut_section(raw_html, section_id, tag)
+                for section_id, tag in SECTIONS.items()
+            }
+
+    def _nowcast_temperature(self) -> str:
+        section = self.sections["nowcast-card-temperature"]
+        if (match := _VALUE_DIV.search(section)) is None:
+            raise ValueError("No value in nowcast-card-temperature")
+        return _text(match[1])
+
+    def _current_observations_script(self) -> str:
+        if (match := _SCRIPT.search(self.sections["product_display"])) is None:
+            raise ValueError("No script in product_display")
+        return _unescaped(match[1])
+
+    def _hourly_scripts(self) -> list[str]:
+        return [
+            _unescaped(match[1])
+            for match in _SCRIPT.finditer(self.sections["hourly-container"])
+        ]
+
+    def _first_date(self) -> tuple[str, int]:
+        headers = _TH.findall(self.sections["daterow"])
+        if (match := _SPAN.search(headers[0])) is None:
+            raise ValueError("No date in daterow")
+        return _text(match[1]), len(headers)
+
+    def _weather_rows(self) -> Iterator[tuple[tuple[str, ...], str]]:
+        for match in _TR.finditer(self.sections["weather"]):
+            attributes = {
+                name.lower(): _unescaped(value.strip("\"'"))
+                for name, value in _ATTRIBUTE.findall(match[1])
+            }
+            yield (attributes.get("id"), attributes.get("class")), match[2]
+
+    def _row_cells(self, row: str, cell: str) -> list[str]:
+        if cell == CELL_VALUE:
+            return [_text(_SPAN.findall(div)[1]) for div in _DIV.findall(row)]
+        return [_text(span) for span in _SPAN.findall(row)]
+
+
+def _cut_section(raw_html: str, section_id: str, tag: str) -> str:
+    """Return the inner html of the element `tag` with the id `section_id`.
+
+    Nested elements of the same tag are counted to find its closing tag.
+    """
+    opening = re.compile(
+        rf"""<{tag}\b[^>]*\bid=["']?{re.escape(section_id)}(?=["'\s>])[^>]*>""",
+        re.IGNORECASE,
+    )
+    if (match := opening.search(raw_html)) is None:
+        raise ValueError(f"Section {section_id} not found in the page")
+    depth = 1
+    for tag_match in _tag_pattern(tag).finditer(raw_html, match.end()):
+        depth += -1 if tag_match[1] else 1
+        if not depth:
+            return raw_html[match.end() : tag_match.start()]
+    raise ValueError(f"Section {section_id} is not closed")
+
+
+@cache
+def _tag_pattern(tag: str) -> re.Pattern[str]:
+    return re.compile(rf"<(/?){tag}\b[^>]*>", re.IGNORECASE)
+
+
+def _text(fragment: str) -> str:
+    return _unescaped(_TAG.sub("", fragment))
+
+
+_TAG: Final = re.compile(r"<[^>]*>")
+_SCRIPT: Final = re.compile(
+    r"<script\b[^>]*>(.*?)</script\s*>", re.IGNORECASE | re.DOTALL
+)
+_SPAN: Final = re.compile(r"<span\b[^>]*>(.*?)</span\s*>", re.IGNORECASE | re.DOTALL)
+_DIV: Final = re.compile(r"<div\b[^>]*>(.*?)</div\s*>", re.IGNORECASE | re.DOTALL)
+_TH: Final = re.compile(r"<th\b[^>]*>(.*?)</th\s*>", re.IGNORECASE | re.DOTALL)
+_TR: Final = re.compile(r"<tr\b([^>]*)>(.*?)</tr\s*>", re.IGNORECASE | re.DOTALL)
+_VALUE_DIV: Final = re.compile(
+    r"""<div\b[^>]*\bclass=["'](?:[^"']*\s)?value(?:\s[^"']*)?["'][^>]*>(.*?)</div\s*>""",
+    re.IGNORECASE | re.DOTALL,
+)
+_ATTRIBUTE: Final = re.compile(r"""([\w-]+)\s*=\s*("[^"]*"|'[^']*'|[^\s>]+)""")
+
+
+class SectionCollector:
+    """Incremental html parser which keeps only the given section subtrees.
+
+    `wanted` maps the id of each section to its tag, by default `SECTIONS`.
+    """
+
+    def __init__(  # noqa: D107
+        self, encoding: str | None = None, wanted: dict[str, str] | None = None
+    ) -> None:
+        etree = import_parser_module("lxml.etree")
+        self._parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+        self._depth = 0
+        self._wanted = SECTIONS if wanted is None else wanted
+        self.sections: dict[str, etree._Element] = {}
+
+    @property
+    def complete(self) -> bool:
+        """Return True once every section has been closed."""
+        return len(self.sections) == len(self._wanted)
+
+    def feed(self, data: str | bytes) -> None:
+        """Feed the next chunk of the page."""
+        self._parser.feed(data)
+        self._read_events()
+
+    def close(self) -> dict[str, etree._Element]:
+        """Finish parsing and return the sections by id."""
+        self._parser.close()
+        self._read_events()
+        if missing := self._wanted.keys() - self.sections.keys():
+            raise ValueError(f"Sections {sorted(missing)} not found in the page")
+        return self.sections
+
+    def _read_events(self) -> None:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._depth or self._is_section(element):
+                    self._depth += 1
+            elif self._depth:
+                self._depth -= 1
+                if not self._depth:
+                    self.sections[element.get("id")] = element
+            else:
+                element.clear()
+                # Comments and processing instructions before the root are
+                # its siblings, but the root has no parent to drop them from.
+                if (parent := element.getparent()) is None:
+                    continue
+                while (previous := element.getprevious()) is not None:
+                    parent.remove(previous)
+
+    def _is_section(self, element: etree._Element) -> bool:
+        section_id = element.get("id")
+        return (
+            self._wanted.get(section_id) == element.tag
+            and section_id not in self.sections
         )
-        for i, tag in enumerate(tags):
-            forecast[i]["precipitationProbability"] = int(
-                str(tag.text).lstrip().rstrip(" %\n")
-            )
 
-        return forecast
+
+SECTIONS: Final[dict[str, str]] = {
+    "nowcast-card-temperature": "div",
+    "product_display": "div",
+    "hourly-container": "div",
+    "daterow": "table",
+    "weather": "table",
+}
+NOWCAST_SECTIONS: Final[dict[str, str]] = {
+    section_id: SECTIONS[section_id]
+    for section_id in ("nowcast-card-temperature", "product_display")
+}
+_SECTION_MARKER: Final = re.compile(
+    rb"""\bid=["']?(%s)["'\s>]"""
+    % b"|".join(re.escape(section_id.encode()) for section_id in SECTIONS)
+)
+_SECTION_MARKER_TAIL: Final = max(map(len, SECTIONS)) + 8
+
+
+def _unescaped(text: str) -> str:
+    return html.unescape(str(text))
+
+
+PARSERS: Final[dict[str, type[WeatherUtils]]] = {
+    PARSER_BS4: WeatherUtils,
+    PARSER_LXML: LxmlWeatherUtils,
+    PARSER_REGEX: RegexWeatherUtils,
+}
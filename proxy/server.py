@@ -0,0 +1,256 @@
+"""Caching proxy sharing one WetterOnline fetch and parse between instances.
+
+Several Home Assistant instances following the same locations can point
+their `proxy_url` option at one proxy. The proxy fetches and parses each
+location at most once per `--interval` and serves the parsed data in the
+compact form of `WetterOnlineData.as_compact`, with an ETag for
+conditional requests and the Last-Modified time of the page.
+
+    python -m proxy.server --port 8780
+    python -m proxy.server --upstream http://127.0.0.1:8000 --interval 60
+
+`--upstream` points the proxy at a stand-in server instead of WetterOnline,
+see `benchmarks.proxy_check` for a fully offline run. The proxy imports the
+API module through the integration and thus needs Home Assistant installed.
+"""
+
+import argparse
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from email.utils import format_datetime
+import hashlib
+import json
+import logging
+import time
+
+from aiohttp import ClientError, ClientSession, hdrs, web
+
+from custom_components.wetteronline.wetteronline_api import (
+    BASE_URL,
+    PROXY_WEATHER_PATH,
+    SingleFlight,
+    WetterOnline,
+    WetterOnlineData,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PROXY_STATS_PATH = "/v1/stats"
+DEFAULT_INTERVAL = 300.0
+DEFAULT_MAX_STALE = 6 * 3600.0
+DEFAULT_RETRY = 15.0
+DEFAULT_MAX_LOCATIONS = 64
+
+
+@dataclass(slots=True)
+class CachedLocation:
+    """The client and the last served data of one location."""
+
+    client: WetterOnline
+    data: WetterOnlineData | None = None
+    body: bytes = b""
+    etag: str = ""
+    last_modified: str | None = None
+    fetched_at: float = -float("inf")
+    served: int = 0
+    failures: int = 0
+    retry_at: float = -float("inf")
+    error: str = ""
+
+
+class CacheProxy:
+    """Serve the parsed data of WetterOnline locations from a cache.
+
+    A location is refreshed when its data is older than `interval` seconds,
+    concurrent requests share one refresh. When a refresh fails, data up to
+    `max_stale` seconds old is served with a Warning header instead. After
+    a failure the upstream is not asked again for `retry` seconds, doubled
+    with every further failure up to `interval`. A location only counts
+    towards `max_locations` once a refresh succeeded, the ones still
+    failing are kept apart and the oldest of them dropped when there are
+    too many.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession | None = None,
+        upstream: str = BASE_URL,
+        interval: float = DEFAULT_INTERVAL,
+        max_stale: float = DEFAULT_MAX_STALE,
+        max_locations: int = DEFAULT_MAX_LOCATIONS,
+        retry: float = DEFAULT_RETRY,
+    ) -> None:
+        """Initialize."""
+        self._session = session
+        self._upstream = upstream
+        self._interval = interval
+        self._max_stale = max_stale
+        self._max_locations = max_locations
+        self._retry = retry
+        self._single_flight = SingleFlight()
+        self.locations: dict[str, CachedLocation] = {}
+        self._pending: dict[str, CachedLocation] = {}
+
+    def app(self) -> web.Application:
+        """Return the web application of the proxy.
+
+        Without a session one is opened for the lifetime of the application.
+        """
+        app = web.Application()
+        app.router.add_get(PROXY_WEATHER_PATH, self._handle_weather)
+        app.router.add_get(PROXY_STATS_PATH, self._handle_stats)
+        if self._session is None:
+            app.cleanup_ctx.append(self._session_ctx)
+        return app
+
+    async def _session_ctx(self, app: web.Application) -> AsyncIterator[None]:
+        async with ClientSession() as self._session:
+            yield
+
+    async def _handle_weather(self, request: web.Request) -> web.StreamResponse:
+        if not (url := request.query.get("url")):
+            raise web.HTTPBadRequest(text="Missing url parameter")
+        url = f"/{url.lstrip('/')}"
+        location = self._location(url)
+        now = time.monotonic()
+        if now - location.fetched_at >= self._interval and now >= location.retry_at:
+            await self._async_update(url, location, now)
+
+        headers = {}
+        if location.failures:
+            if time.monotonic() - location.fetched_at >= self._max_stale:
+                raise web.HTTPBadGateway(text=location.error)
+            headers[hdrs.WARNING] = '110 - "Response is Stale"'
+
+        location.served += 1
+        headers[hdrs.ETAG] = location.etag
+        if location.last_modified:
+            headers[hdrs.LAST_MODIFIED] = location.last_modified
+        if _etag_matches(request, location.etag):
+            return web.Response(status=304, headers=headers)
+        response = web.Response(
+            body=location.body, content_type="application/json", headers=headers
+        )
+        response.enable_compression()
+        return response
+
+    def _location(self, url: str) -> CachedLocation:
+        """Return the cached location of `url`, a pending one if it is new."""
+        if (location := self.locations.get(url) or self._pending.get(url)) is None:
+            if len(self.locations) >= self._max_locations:
+                raise web.HTTPServiceUnavailable(text="Too many locations")
+            if len(self._pending) >= self._max_locations:
+                del self._pending[next(iter(self._pending))]
+            location = self._pending[url] = CachedLocation(
+                WetterOnline(
+                    self._session,
+                    url,
+                    base_url=self._upstream,
+                    single_flight=self._single_flight,
+                )
+            )
+        return location
+
+    async def _async_update(
+        self, url: str, location: CachedLocation, started: float
+    ) -> None:
+        """Refresh a location, a pending one is cached once it succeeded."""
+        try:
+            await self._async_refresh(location)
+        except (ClientError, TimeoutError) as error:
+            self._failed(url, location, error, started)
+            return
+        except Exception as error:
+            # Not the network, a page the parser cannot read.
+            _LOGGER.exception("Parsing %s failed", url)
+            self._failed(url, location, error, started)
+            return
+        self._pending.pop(url, None)
+        if url not in self.locations:
+            if len(self.locations) >= self._max_locations:
+                raise web.HTTPServiceUnavailable(text="Too many locations")
+            self.locations[url] = location
+
+    def _failed(
+        self, url: str, location: CachedLocation, error: Exception, started: float
+    ) -> None:
+        # Concurrent requests share the failure, it is counted only once.
+        if location.retry_at > started:
+            return
+        location.failures += 1
+        delay = min(self._retry * 2 ** (location.failures - 1), self._interval)
+        location.retry_at = time.monotonic() + delay
+        location.error = str(error) or type(error).__name__
+        _LOGGER.warning(
+            "Refreshing %s failed, retry in %.0f s: %s", url, delay, location.error
+        )
+
+    async def _async_refresh(self, location: CachedLocation) -> None:
+        data = await location.client.async_get_weather()
+        location.fetched_at = time.monotonic()
+        location.failures = 0
+        location.retry_at = -float("inf")
+        # The client returns the very same object when the page is unchanged.
+        if data is location.data:
+            return
+        body = json.dumps(data.as_compact(), separators=(",", ":")).encode()
+        location.data = data
+        location.body = body
+        location.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        modified_at = location.client.last_modified
+        location.last_modified = (
+            format_datetime(modified_at, usegmt=True) if modified_at else None
+        )
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                url: {
+                    "served": location.served,
+                    "failures": location.failures,
+                    **asdict(location.client.stats),
+                }
+                for url, location in (self._pending | self.locations).items()
+            }
+        )
+
+
+def _etag_matches(request: web.Request, etag: str) -> bool:
+    """Return True if the If-None-Match header of the request matches `etag`.
+
+    If-None-Match compares weakly, a W/ prefix does not matter, and `*`
+    matches any current data.
+    """
+    if not etag or not (tags := request.if_none_match):
+        return False
+    value = etag.strip('"')
+    return any(tag.value in ("*", value) for tag in tags)
+
+
+def main() -> None:
+    """Run the proxy."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--upstream", default=BASE_URL)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("--max-stale", type=float, default=DEFAULT_MAX_STALE)
+    parser.add_argument("--max-locations", type=int, default=DEFAULT_MAX_LOCATIONS)
+    parser.add_argument("--retry", type=float, default=DEFAULT_RETRY)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    proxy = CacheProxy(
+        upstream=args.upstream,
+        interval=args.interval,
+        max_stale=args.max_stale,
+        max_locations=args.max_locations,
+        retry=args.retry,
+    )
+    web.run_app(proxy.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
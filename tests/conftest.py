@@ -0,0 +1,3 @@
+"""Fixtures for the WetterOnline tests."""
+
+pytest_plugins = "pytest_homeassistant_custom_component"
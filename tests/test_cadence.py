@@ -0,0 +1,101 @@
+"""Tests of the refresh cadence."""
+
+from datetime import UTC, datetime, timedelta
+import random
+
+from aiohttp import ClientResponseError, RequestInfo
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from custom_components.wetteronline.cadence import (
+    BUDGET_WINDOW,
+    RefreshCadence,
+    retry_after,
+)
+from custom_components.wetteronline.const import ERROR_BACKOFF, MAX_BACKOFF
+
+NOW = datetime(2026, 10, 17, 12, tzinfo=UTC)
+BASE_INTERVAL = timedelta(minutes=15)
+
+
+def _cadence(requests_per_hour: int = 60) -> RefreshCadence:
+    return RefreshCadence(BASE_INTERVAL, requests_per_hour, random.Random(1))
+
+
+def test_backoff_doubles_up_to_the_maximum() -> None:
+    """Test the backoff doubles per error with equal jitter and is clamped."""
+    cadence = _cadence()
+    for errors in range(1, 12):
+        backoff = min(ERROR_BACKOFF * 2 ** (errors - 1), MAX_BACKOFF)
+        assert backoff / 2 <= cadence.record_error(NOW) <= backoff
+    assert cadence.errors == 11
+    assert cadence.record_error(NOW) <= MAX_BACKOFF
+
+
+def test_retry_after_extends_the_backoff() -> None:
+    """Test Retry-After wins over a shorter backoff, also beyond the maximum."""
+    cadence = _cadence()
+    assert cadence.record_error(NOW, timedelta(hours=2)) == timedelta(hours=2)
+    assert cadence.record_error(NOW, timedelta(seconds=1)) >= ERROR_BACKOFF
+
+
+def test_success_resets_the_backoff() -> None:
+    """Test a success ends the backoff and polls at the base interval."""
+    cadence = _cadence()
+    cadence.record_error(NOW)
+    cadence.record_error(NOW)
+    assert cadence.record_success(NOW, changed=True) == BASE_INTERVAL
+    assert cadence.errors == 0
+    assert ERROR_BACKOFF / 2 <= cadence.record_error(NOW) <= ERROR_BACKOFF
+
+
+def test_rolling_budget() -> None:
+    """Test the budget counts the requests of the last hour."""
+    cadence = _cadence(requests_per_hour=4)
+    for minute in range(4):
+        assert not cadence.budget_exhausted(NOW + timedelta(minutes=minute))
+        cadence.record_request(NOW + timedelta(minutes=minute))
+
+    later = NOW + timedelta(minutes=10)
+    assert cadence.budget_exhausted(later)
+    # The next poll waits until the first request left the window.
+    assert cadence.next_interval(later) == NOW + BUDGET_WINDOW - later
+    assert cadence.record_error(later) == NOW + BUDGET_WINDOW - later
+
+    assert not cadence.budget_exhausted(NOW + BUDGET_WINDOW)
+    assert cadence.budget_exhausted(NOW + BUDGET_WINDOW, reserve=1)
+    assert not cadence.budget_exhausted(NOW + BUDGET_WINDOW + timedelta(minutes=3))
+
+
+def test_learned_period() -> None:
+    """Test the next poll follows the publication period once learned."""
+    cadence = _cadence()
+    for change in range(3):
+        published_at = NOW + timedelta(minutes=30 * change)
+        cadence.record_success(published_at + timedelta(minutes=5), True, published_at)
+    assert cadence.period == timedelta(minutes=30)
+    # Published at 13:00, the next one at 13:30 is polled a minute later.
+    assert cadence.next_interval(NOW + timedelta(minutes=65)) == timedelta(minutes=26)
+
+
+def _response_error(headers: dict[str, str]) -> ClientResponseError:
+    url = URL("https://www.wetteronline.de/wetter/berlin")
+    return ClientResponseError(
+        RequestInfo(url, "GET", CIMultiDictProxy(CIMultiDict()), url),
+        (),
+        status=429,
+        headers=CIMultiDictProxy(CIMultiDict(headers)),
+    )
+
+
+def test_retry_after_header() -> None:
+    """Test Retry-After is read as seconds or as an HTTP date."""
+    assert retry_after(_response_error({"Retry-After": "120"}), NOW) == timedelta(
+        seconds=120
+    )
+    assert retry_after(
+        _response_error({"Retry-After": "Sat, 17 Oct 2026 12:05:00 GMT"}), NOW
+    ) == timedelta(minutes=5)
+    assert retry_after(_response_error({"Retry-After": "soon"}), NOW) is None
+    assert retry_after(_response_error({}), NOW) is None
+    assert retry_after(ValueError(), NOW) is None
@@ -0,0 +1,132 @@
+"""Tests of the refreshes of the forecast coordinator."""
+
+from datetime import timedelta
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from benchmarks.pages import synthetic_page
+from custom_components.wetteronline.const import (
+    CONF_REQUESTS_PER_HOUR,
+    CONF_URL_WETTERONLINE,
+    DOMAIN,
+    ERROR_BACKOFF,
+    UPDATE_INTERVAL_WETTERONLINE,
+)
+from custom_components.wetteronline.coordinator import (
+    WeatherOnlineDataUpdateCoordinator,
+)
+from custom_components.wetteronline.wetteronline_api import BASE_URL
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+URL = "/wetter/berlin"
+HEADERS = {"Content-Type": "text/html; charset=utf-8"}
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Enable the integration."""
+
+
+@pytest.fixture
+def page() -> bytes:
+    """Return a page for the current hour."""
+    return synthetic_page(dt_util.now(), "Europe/Berlin", 12).encode()
+
+
+async def _async_setup(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    page: bytes,
+    requests_per_hour: int = 12,
+) -> WeatherOnlineDataUpdateCoordinator:
+    aioclient_mock.get(f"{BASE_URL}{URL}", content=page, headers=HEADERS)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_URL_WETTERONLINE: URL, CONF_NAME: "Berlin"},
+        options={CONF_REQUESTS_PER_HOUR: requests_per_hour},
+        unique_id="Berlin",
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: WeatherOnlineDataUpdateCoordinator = entry.runtime_data
+    # Without the coalescing TTL every fetch reaches the server.
+    coordinator.wetteronline.single_flight.ttl = 0
+    return coordinator
+
+
+async def test_fetch(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, page: bytes
+) -> None:
+    """Test a refresh parses the page and counts against the budget."""
+    coordinator = await _async_setup(hass, aioclient_mock, page)
+    assert coordinator.last_update_success
+    assert coordinator.data.current_observations["temperature"] == 12
+    assert coordinator.update_interval == UPDATE_INTERVAL_WETTERONLINE
+    assert coordinator.cadence.as_dict()["requests_last_hour"] == 1
+
+    # The same page again changes nothing.
+    data = await coordinator._async_fetch_data()
+    assert data == coordinator.data
+    assert coordinator.changed_sections == frozenset()
+    assert aioclient_mock.call_count == 2
+
+
+async def test_fetch_failure_backs_off(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, page: bytes
+) -> None:
+    """Test a failed refresh raises UpdateFailed and backs off."""
+    coordinator = await _async_setup(hass, aioclient_mock, page)
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(f"{BASE_URL}{URL}", status=500)
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_fetch_data()
+    assert ERROR_BACKOFF / 2 <= coordinator.update_interval <= ERROR_BACKOFF
+    assert coordinator.cadence.errors == 1
+
+
+async def test_fetch_honours_retry_after(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, page: bytes
+) -> None:
+    """Test Retry-After of a rate limited refresh sets the next interval."""
+    coordinator = await _async_setup(hass, aioclient_mock, page)
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(f"{BASE_URL}{URL}", status=429, headers={"Retry-After": "1200"})
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_fetch_data()
+    assert coordinator.update_interval == timedelta(minutes=20)
+
+
+async def test_fetch_within_budget(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, page: bytes
+) -> None:
+    """Test refreshes beyond the budget keep the data without a request."""
+    coordinator = await _async_setup(hass, aioclient_mock, page, requests_per_hour=2)
+    await coordinator._async_fetch_data()
+    assert aioclient_mock.call_count == 2
+
+    data = coordinator.data
+    assert await coordinator._async_fetch_data() is data
+    assert aioclient_mock.call_count == 2
+    # The next poll waits for the first request to leave the window.
+    assert coordinator.update_interval > timedelta(minutes=59)
+
+
+async def test_fetch_within_budget_after_failure(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, page: bytes
+) -> None:
+    """Test a failed refresh keeps failing while the budget is exhausted."""
+    coordinator = await _async_setup(hass, aioclient_mock, page, requests_per_hour=2)
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(f"{BASE_URL}{URL}", status=500)
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+
+    with pytest.raises(UpdateFailed, match="budget exhausted"):
+        await coordinator._async_fetch_data()
+    assert aioclient_mock.call_count == 1
@@ -0,0 +1,90 @@
+"""Tests of the metrics derived from the hourly forecast."""
+
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from custom_components.wetteronline.derived import DailyAggregate, derive_metrics
+from custom_components.wetteronline.wetteronline_api import HourlyForecast
+
+BERLIN = ZoneInfo("Europe/Berlin")
+START = datetime(2026, 10, 17, 20, tzinfo=BERLIN)
+TEMPERATURES = (10, 9, 8, 7, 6, 5, 6, 7)
+PROBABILITIES = (10, None, 60, 20, None, 80, 30, 0)
+PRECIPITATION = (0.1, None, 0.5, 0.2, None, 1.0, None, 0.0)
+
+# 20:00 to 23:00 on the 17th and 00:00 to 03:00 on the 18th.
+FORECAST = [
+    HourlyForecast(
+        datetime=START + timedelta(hours=hour),
+        temperature=temperature,
+        apparent_temperature=None,
+        humidity=None,
+        symbol_text="",
+        precipitation_probability=probability,
+        precipitation=precipitation,
+    )
+    for hour, (temperature, probability, precipitation) in enumerate(
+        zip(TEMPERATURES, PROBABILITIES, PRECIPITATION, strict=True)
+    )
+]
+
+
+def test_metrics() -> None:
+    """Test the metrics as of the middle of the first hour."""
+    metrics = derive_metrics(FORECAST, START + timedelta(minutes=30))
+    assert metrics.remaining_day_min_temperature == 7
+    assert metrics.remaining_day_max_temperature == 10
+    # The first hour with at least 50 % starts in an hour and a half.
+    assert metrics.hours_until_rain == 1
+    assert metrics.precipitation == {3: 0.6, 6: 1.8, 12: 1.8}
+    assert metrics.max_precipitation_probability == {3: 60, 6: 80, 12: 80}
+    assert metrics.daily == (
+        DailyAggregate(date(2026, 10, 17), 4, 7, 10, 0.8, 60),
+        DailyAggregate(date(2026, 10, 18), 4, 5, 7, 1.0, 80),
+    )
+
+
+def test_metrics_later_in_the_day() -> None:
+    """Test the metrics only look at the hours from the current one on."""
+    metrics = derive_metrics(FORECAST, START + timedelta(hours=3, minutes=10))
+    assert metrics.remaining_day_min_temperature == 7
+    assert metrics.remaining_day_max_temperature == 7
+    assert metrics.hours_until_rain == 1
+    assert metrics.precipitation == {3: 1.2, 6: 1.2, 12: 1.2}
+    assert metrics.max_precipitation_probability == {3: 80, 6: 80, 12: 80}
+    assert len(metrics.daily) == 2
+
+
+def test_metrics_before_the_forecast() -> None:
+    """Test a time before the first hour counts from the first hour."""
+    metrics = derive_metrics(FORECAST, START - timedelta(hours=1))
+    assert metrics.hours_until_rain == 3
+    assert metrics.remaining_day_max_temperature == 10
+
+
+def test_unknown_values() -> None:
+    """Test windows and days without any known value are None."""
+    forecast = [
+        replace(hour, precipitation=None, precipitation_probability=None)
+        for hour in FORECAST
+    ]
+    metrics = derive_metrics(forecast, START)
+    assert metrics.hours_until_rain is None
+    assert metrics.precipitation == {3: None, 6: None, 12: None}
+    assert metrics.max_precipitation_probability == {3: None, 6: None, 12: None}
+    assert [day.precipitation for day in metrics.daily] == [None, None]
+    assert [day.max_precipitation_probability for day in metrics.daily] == [
+        None,
+        None,
+    ]
+
+
+def test_empty_forecast() -> None:
+    """Test an empty forecast has no metrics."""
+    metrics = derive_metrics([], START)
+    assert metrics.computed_at == START
+    assert metrics.remaining_day_min_temperature is None
+    assert metrics.hours_until_rain is None
+    assert metrics.precipitation == {3: None, 6: None, 12: None}
+    assert metrics.daily == ()
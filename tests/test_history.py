@@ -0,0 +1,149 @@
+"""Tests of the forecast history file."""
+
+from datetime import UTC, datetime, timedelta
+import math
+from pathlib import Path
+import threading
+
+import pytest
+
+from custom_components.wetteronline import history
+from custom_components.wetteronline.const import HISTORY_RETENTION
+from custom_components.wetteronline.history import (
+    DAY,
+    HEADER,
+    HOUR,
+    KIND_DAILY,
+    KIND_HOURLY,
+    KIND_OBSERVED,
+    RECORD,
+    ForecastHistory,
+    Record,
+)
+
+NOW = datetime(2026, 10, 17, 12, tzinfo=UTC)
+NOW_SECONDS = int(NOW.timestamp())
+
+
+def _observed(issued: int, temperature: float = 10.0) -> Record:
+    return (KIND_OBSERVED, issued, issued, temperature, math.nan, math.nan)
+
+
+def _values(records: list[Record]) -> list[tuple[int, int, int, float]]:
+    """Return the records without the NaN fields, which never compare equal."""
+    return [record[:4] for record in records]
+
+
+@pytest.fixture
+def forecast_history(tmp_path: Path) -> ForecastHistory:
+    """Return a history in a fresh directory."""
+    return ForecastHistory(tmp_path / "wetteronline" / "entry.history")
+
+
+def test_append_and_read(forecast_history: ForecastHistory) -> None:
+    """Test records are read back in the order they were appended."""
+    assert list(forecast_history.records()) == []
+    records = [_observed(NOW_SECONDS - 60 * minute) for minute in (2, 1, 0)]
+    forecast_history.append(records[:2], NOW)
+    forecast_history.append(records[2:], NOW)
+    assert _values(list(forecast_history.records())) == _values(records)
+    assert forecast_history.size() == len(HEADER) + 3 * RECORD.size
+
+
+def test_rotation_drops_expired_records(forecast_history: ForecastHistory) -> None:
+    """Test records are dropped once the oldest is a day past the retention."""
+    retention = int(HISTORY_RETENTION.total_seconds())
+    records = [_observed(NOW_SECONDS - retention - HOUR), _observed(NOW_SECONDS)]
+    forecast_history.append(records, NOW)
+    # Less than a day past the retention the file is not rewritten yet.
+    assert _values(list(forecast_history.records())) == _values(records)
+
+    later = NOW + timedelta(days=1)
+    forecast_history.append([_observed(int(later.timestamp()))], later)
+    assert _values(list(forecast_history.records())) == _values(
+        [records[1], _observed(int(later.timestamp()))]
+    )
+
+
+def test_rotation_caps_the_size(
+    forecast_history: ForecastHistory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test a file beyond the maximum size is cut to the newest half."""
+    monkeypatch.setattr(history, "HISTORY_MAX_BYTES", len(HEADER) + 10 * RECORD.size)
+    records = [_observed(NOW_SECONDS - 60 * (20 - minute)) for minute in range(20)]
+    forecast_history.append(records, NOW)
+    assert _values(list(forecast_history.records())) == _values(records[-5:])
+
+
+def test_torn_record_is_cut_off(forecast_history: ForecastHistory) -> None:
+    """Test the rest of a record torn by a crash is cut off before appending."""
+    forecast_history.append([_observed(NOW_SECONDS - 60)], NOW)
+    with forecast_history.path.open("ab") as file:
+        file.write(RECORD.pack(*_observed(NOW_SECONDS - 30))[:5])
+    assert len(list(forecast_history.records())) == 1
+    forecast_history.append([_observed(NOW_SECONDS)], NOW)
+    assert _values(list(forecast_history.records())) == _values(
+        [_observed(NOW_SECONDS - 60), _observed(NOW_SECONDS)]
+    )
+
+
+def test_torn_header_is_started_again(forecast_history: ForecastHistory) -> None:
+    """Test a file cut off within the header is started again."""
+    forecast_history.path.parent.mkdir(parents=True)
+    forecast_history.path.write_bytes(HEADER[:3])
+    forecast_history.append([_observed(NOW_SECONDS)], NOW)
+    assert _values(list(forecast_history.records())) == _values(
+        [_observed(NOW_SECONDS)]
+    )
+    assert not forecast_history.path.with_suffix(".bad").exists()
+
+
+def test_foreign_file_is_set_aside(forecast_history: ForecastHistory) -> None:
+    """Test a file with a foreign header is set aside before appending."""
+    forecast_history.path.parent.mkdir(parents=True)
+    foreign = b"NOTHIST!" + bytes(3 * RECORD.size)
+    forecast_history.path.write_bytes(foreign)
+    forecast_history.append([_observed(NOW_SECONDS)], NOW)
+    assert _values(list(forecast_history.records())) == _values(
+        [_observed(NOW_SECONDS)]
+    )
+    assert forecast_history.path.with_suffix(".bad").read_bytes() == foreign
+
+
+def test_records_do_not_hold_the_lock(forecast_history: ForecastHistory) -> None:
+    """Test appending while a reader is between two records."""
+    forecast_history.append([_observed(NOW_SECONDS - 60)] * 2, NOW)
+    records = forecast_history.records()
+    next(records)
+    appending = threading.Thread(
+        target=forecast_history.append, args=([_observed(NOW_SECONDS)], NOW)
+    )
+    appending.start()
+    appending.join(timeout=5)
+    assert not appending.is_alive()
+    assert len(list(records)) == 1
+    assert len(list(forecast_history.records())) == 3
+
+
+def test_forecast_error(forecast_history: ForecastHistory) -> None:
+    """Test forecasts are compared to the observations by lead time."""
+    day = NOW_SECONDS - NOW_SECONDS % DAY - DAY
+    observations = [_observed(day + hour * HOUR, 10.0 + hour % 4) for hour in range(24)]
+    forecasts = [
+        (KIND_HOURLY, day, day + 2 * HOUR, 13.0, math.nan, 20.0),
+        (KIND_HOURLY, day, day + 3 * HOUR, 12.0, math.nan, 20.0),
+        (KIND_DAILY, day - DAY, day, 14.0, 9.0, 20.0),
+    ]
+    forecast_history.append(forecasts, NOW)
+    forecast_history.append(observations, NOW)
+    errors = forecast_history.forecast_error()
+    assert errors["hourly_temperature"] == {
+        2: {"count": 1, "bias": 1.0, "mae": 1.0, "rmse": 1.0},
+        3: {"count": 1, "bias": -1.0, "mae": 1.0, "rmse": 1.0},
+    }
+    assert errors["daily_max_temperature"] == {
+        1: {"count": 1, "bias": 1.0, "mae": 1.0, "rmse": 1.0}
+    }
+    assert errors["daily_min_temperature"] == {
+        1: {"count": 1, "bias": -1.0, "mae": 1.0, "rmse": 1.0}
+    }
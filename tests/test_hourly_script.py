@@ -0,0 +1,54 @@
+"""Tests of the decoding of the hourly forecast scripts."""
+
+import pytest
+
+from custom_components.wetteronline.wetteronline_api import decode_hourly_script
+
+SCRIPT = """
+WO.metadata.p_city_weather.hourlyForecastElements.push({
+    hour: 14,
+    daySynonym: "heute",
+    windDirectionShortSector: "SW",
+    windDirection: "S&uuml;dwest",
+    windGusts: 3,
+    windSpeedKmh: 12.5,
+    precipitationAmount: "0,4 l/m²",
+    temperature: -2,
+    symbolText: 'Schauer, \\'vereinzelt\\'',
+    quoted: "a \\"b\\" c",
+    empty: ,
+    docrootVersion: "2.9.34"
+})
+"""
+
+
+def test_decode_hourly_script() -> None:
+    """Test keys are renamed or skipped and values converted."""
+    assert decode_hourly_script(SCRIPT) == {
+        "hour": 14,
+        "daySynonym": "heute",
+        "windDirection": "SW",
+        "windDirectionLong": "S&uuml;dwest",
+        "windGustsBft": 3,
+        "windSpeedKmh": 12.5,
+        "precipitationAmount": "0,4 l/m²",
+        "temperature": -2,
+        "symbolText": "Schauer, 'vereinzelt'",
+        "quoted": 'a "b" c',
+        "empty": "",
+    }
+
+
+def test_decode_hourly_script_single_line() -> None:
+    """Test a script without line breaks."""
+    assert decode_hourly_script('push({hour: 3, symbol: "mo____"})') == {
+        "hour": 3,
+        "symbol": "mo____",
+    }
+
+
+@pytest.mark.parametrize("script", ["", "push(hour: 3)", "push({hour: 3"])
+def test_decode_hourly_script_without_object(script: str) -> None:
+    """Test a script without an object literal is rejected."""
+    with pytest.raises(ValueError, match="No object literal"):
+        decode_hourly_script(script)
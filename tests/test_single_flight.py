@@ -0,0 +1,103 @@
+"""Tests of the coalescing of concurrent calls."""
+
+import asyncio
+
+import pytest
+
+from custom_components.wetteronline.wetteronline_api import SingleFlight
+
+
+class Clock:
+    """Stand-in for the clock of the event loop."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.now = 0.0
+
+    def time(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+async def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    """Let the test set the time SingleFlight reads from the event loop."""
+    clock = Clock()
+    monkeypatch.setattr(asyncio.get_running_loop(), "time", clock.time)
+    return clock
+
+
+class Counter:
+    """Call counting stand-in for a fetch."""
+
+    def __init__(self, fail: int = 0) -> None:
+        """Initialize."""
+        self.calls = 0
+        self._fail = fail
+
+    async def __call__(self) -> int:
+        """Return the number of the call after a turn of the event loop."""
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(0)
+        if call <= self._fail:
+            raise ValueError("failed")
+        return call
+
+
+async def test_concurrent_calls_share_one_flight() -> None:
+    """Test concurrent callers of a key share one call."""
+    single_flight = SingleFlight(ttl=0)
+    fetch = Counter()
+    results = await asyncio.gather(
+        *(single_flight.async_call("berlin", fetch) for _ in range(3)),
+        single_flight.async_call("wien", fetch),
+    )
+    assert results == [1, 1, 1, 2]
+    assert single_flight.stats.flights == 2
+    assert single_flight.stats.coalesced == 2
+
+
+async def test_result_is_shared_for_the_ttl(clock: Clock) -> None:
+    """Test a result is handed out for `ttl` seconds, then fetched again."""
+    single_flight = SingleFlight(ttl=10)
+    fetch = Counter()
+    assert await single_flight.async_call("berlin", fetch) == 1
+    clock.now = 9.9
+    assert await single_flight.async_call("berlin", fetch) == 1
+    assert single_flight.stats.ttl_hits == 1
+    clock.now = 10
+    assert await single_flight.async_call("berlin", fetch) == 2
+
+
+async def test_without_ttl_nothing_is_kept() -> None:
+    """Test consecutive calls each run without a TTL."""
+    single_flight = SingleFlight(ttl=0)
+    fetch = Counter()
+    assert await single_flight.async_call("berlin", fetch) == 1
+    assert await single_flight.async_call("berlin", fetch) == 2
+
+
+async def test_failures_are_not_kept(clock: Clock) -> None:
+    """Test a failure is shared by the concurrent callers only."""
+    single_flight = SingleFlight(ttl=10)
+    fetch = Counter(fail=1)
+    results = await asyncio.gather(
+        single_flight.async_call("berlin", fetch),
+        single_flight.async_call("berlin", fetch),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert await single_flight.async_call("berlin", fetch) == 2
+
+
+async def test_cancelled_caller_does_not_cancel_the_flight() -> None:
+    """Test the other callers still get the result when one is cancelled."""
+    single_flight = SingleFlight(ttl=0)
+    fetch = Counter()
+    cancelled = asyncio.ensure_future(single_flight.async_call("berlin", fetch))
+    waiting = asyncio.ensure_future(single_flight.async_call("berlin", fetch))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    assert await waiting == 1
+    assert fetch.calls == 1